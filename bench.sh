@@ -0,0 +1 @@
+python3 bench/run_bench.py "$@"
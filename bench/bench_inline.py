@@ -0,0 +1,39 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from node_helpers import split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+from textnode import TextNode, TextType
+
+SENTENCE = (
+    "This is **bold** with an _italic_ word, a `code span`, "
+    "an ![image](/images/tom.png) and a [link](/blog/tom). "
+)
+
+def split_pipeline(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+def best_of(fn, text, repeat=5):
+    number = max(1, 20000 // len(text))
+    return min(timeit.repeat(lambda: fn(text), number=number, repeat=repeat)) / number
+
+def main():
+    print(f"{'sentences':>10} {'bytes':>9} {'split (ms)':>11} {'single (ms)':>12} {'speedup':>8}")
+    for count in (1, 10, 100, 1000):
+        text = SENTENCE * count
+        if split_pipeline(text) != text_to_textnodes(text):
+            raise SystemExit("tokenizer output differs from the split pipeline")
+        old = best_of(split_pipeline, text)
+        new = best_of(text_to_textnodes, text)
+        print(f"{count:>10} {len(text):>9} {old * 1000:>11.3f} {new * 1000:>12.3f} {old / new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from node_helpers import markdown_to_html_node
+
+# Each list item yields an li ParentNode plus four leaves (text, b, text, a)
+ITEMS = 2000
+MARKDOWN = "\n".join(f"- item **{i}** and [link](/blog/{i})" for i in range(ITEMS))
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in node.children or [])
+
+def main():
+    root = markdown_to_html_node(MARKDOWN)
+    nodes = count_nodes(root)
+    del root
+
+    tracemalloc.start()
+    root = markdown_to_html_node(MARKDOWN)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del root
+
+    build = min(timeit.repeat(lambda: markdown_to_html_node(MARKDOWN), number=3, repeat=20)) / 3
+    root = markdown_to_html_node(MARKDOWN)
+    render = min(timeit.repeat(root.to_html, number=3, repeat=20)) / 3
+
+    scale = 10000 / nodes
+    print(f"nodes per document:   {nodes}")
+    print(f"retained per 10k:     {current * scale / 1024:.0f} KiB")
+    print(f"peak per 10k:         {peak * scale / 1024:.0f} KiB")
+    print(f"parse per 10k:        {build * scale * 1000:.2f} ms")
+    print(f"to_html per 10k:      {render * scale * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
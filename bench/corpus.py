@@ -0,0 +1,127 @@
+import os
+import random
+
+# Relative weights of block kinds, and of inline elements inside text blocks
+DEFAULT_MIX = {
+    "heading": 2,
+    "paragraph": 6,
+    "list": 3,
+    "quote": 1,
+    "code": 1,
+    "link": 2,
+    "image": 1,
+}
+BLOCK_KINDS = ("heading", "paragraph", "list", "quote", "code")
+INLINE_KINDS = ("plain", "bold", "italic", "code", "link", "image")
+
+WORDS = (
+    "elves rivendell glorfindel bombadil shire hobbit river valley mithril ring "
+    "forest barrow wight lembas balrog mountain road fellowship council star song"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+def parse_mix(spec):
+    mix = dict(DEFAULT_MIX)
+    if not spec:
+        return mix
+    for item in spec.split(","):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if key not in mix:
+            raise ValueError(f"unknown mix key '{key}', expected one of {', '.join(mix)}")
+        mix[key] = float(value)
+    return mix
+
+class CorpusGenerator():
+    def __init__(self, seed=0, mix=None, blocks_per_page=12):
+        self.random = random.Random(seed)
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.blocks_per_page = blocks_per_page
+        self.block_weights = [self.mix[kind] for kind in BLOCK_KINDS]
+        # Plain runs always dominate so the inline markers stay realistic
+        self.inline_weights = [12, 2, 2, 1, self.mix["link"], self.mix["image"]]
+
+    def words(self, low, high):
+        return " ".join(self.random.choice(WORDS) for _ in range(self.random.randint(low, high)))
+
+    def inline_text(self, low=8, high=30):
+        parts = []
+        for _ in range(self.random.randint(max(1, low // 4), max(1, high // 4))):
+            kind = self.random.choices(INLINE_KINDS, self.inline_weights)[0]
+            text = self.words(1, 4)
+            if kind == "bold":
+                parts.append(f"**{text}**")
+            elif kind == "italic":
+                parts.append(f"_{text}_")
+            elif kind == "code":
+                parts.append(f"`{text}`")
+            elif kind == "link":
+                parts.append(f"[{text}](/blog/{self.random.choice(WORDS)})")
+            elif kind == "image":
+                parts.append(f"![{text}](/images/{self.random.choice(WORDS)}.png)")
+            else:
+                parts.append(text)
+        return " ".join(parts)
+
+    def block(self):
+        kind = self.random.choices(BLOCK_KINDS, self.block_weights)[0]
+        if kind == "heading":
+            return "#" * self.random.randint(2, 4) + " " + self.words(2, 6)
+        if kind == "list":
+            items = [self.inline_text(4, 16) for _ in range(self.random.randint(2, 8))]
+            if self.random.random() < 0.5:
+                return "\n".join(f"- {item}" for item in items)
+            return "\n".join(f"{i}. {item}" for i, item in enumerate(items, 1))
+        if kind == "quote":
+            return "\n".join(f"> {self.inline_text(6, 20)}" for _ in range(self.random.randint(1, 4)))
+        if kind == "code":
+            lines = [f"{self.random.choice(WORDS)} = {self.random.randint(0, 999)}" for _ in range(self.random.randint(2, 12))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        lines = [self.inline_text() for _ in range(self.random.randint(1, 5))]
+        return "\n".join(lines)
+
+    def page(self, index):
+        blocks = [f"# Page {index} {self.words(1, 4)}"]
+        blocks.extend(self.block() for _ in range(self.random.randint(self.blocks_per_page // 2, self.blocks_per_page * 3 // 2)))
+        return "\n\n".join(blocks) + "\n"
+
+def page_path(index, per_dir=100):
+    return os.path.join(f"section{index // per_dir:04d}", f"page{index:06d}", "index.md")
+
+def generate_corpus(root, pages, seed=0, mix=None):
+    generator = CorpusGenerator(seed, mix)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+    total_bytes = 0
+
+    for index in range(pages):
+        path = os.path.join(content_dir, page_path(index))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        text = generator.page(index)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        total_bytes += len(text.encode("utf-8"))
+
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    with open(os.path.join(static_dir, "index.css"), "w", encoding="utf-8") as f:
+        f.write("body { margin: 0; }\n")
+    for word in WORDS[:5]:
+        with open(os.path.join(static_dir, "images", f"{word}.png"), "wb") as f:
+            f.write(bytes(generator.random.getrandbits(8) for _ in range(4096)))
+
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w", encoding="utf-8") as f:
+        f.write(TEMPLATE)
+
+    return {"content_dir": content_dir, "static_dir": static_dir, "template_path": template_path, "bytes": total_bytes}
@@ -0,0 +1,166 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from blocktype import BlockType
+from corpus import generate_corpus, parse_mix
+from main_helpers import build_site, write_page
+from manifest import Manifest
+from node_helpers import classify_block, markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+from template import Template
+
+STAGES = ("markdown_to_blocks", "text_to_textnodes", "markdown_to_html_node", "to_html", "generate_page", "main_cold", "main_warm")
+
+def inline_texts(block):
+    blocktype, payload = classify_block(block)
+    if blocktype in (BlockType.UL, BlockType.OL):
+        return payload
+    if blocktype == BlockType.HEADING:
+        return [payload[1]]
+    if blocktype == BlockType.CODE:
+        return []
+    return [payload]
+
+def time_parser_stages(sources, timings):
+    for path in sources:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+        start = time.perf_counter()
+        blocks = markdown_to_blocks(text)
+        timings["markdown_to_blocks"] += time.perf_counter() - start
+
+        texts = [item for block in blocks for item in inline_texts(block)]
+        start = time.perf_counter()
+        for item in texts:
+            text_to_textnodes(item)
+        timings["text_to_textnodes"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        node = markdown_to_html_node(text)
+        timings["markdown_to_html_node"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        node.to_html()
+        timings["to_html"] += time.perf_counter() - start
+
+def time_generate_page(sources, template_path, out_dir, timings):
+    template = Template.load(template_path)
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    for i, path in enumerate(sources):
+        write_page(path, template, os.path.join(out_dir, f"{i}.html"), "/")
+    timings["generate_page"] += time.perf_counter() - start
+
+def time_main(corpus, root, jobs, timings):
+    out_dir = os.path.join(root, "docs")
+    os.makedirs(out_dir)
+    manifest = Manifest(os.path.join(root, "manifest.json"))
+    # Builds print progress; keep the terminal out of the measurement
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for stage in ("main_cold", "main_warm"):
+            start = time.perf_counter()
+            build_site(corpus["content_dir"], corpus["static_dir"], out_dir, corpus["template_path"], basepath="/", manifest=manifest, jobs=jobs)
+            timings[stage] += time.perf_counter() - start
+
+def run(pages, seed, mix, jobs, workdir):
+    root = tempfile.mkdtemp(prefix=f"bench-{pages}-", dir=workdir)
+    try:
+        start = time.perf_counter()
+        corpus = generate_corpus(root, pages, seed, mix)
+        generate_seconds = time.perf_counter() - start
+
+        sources = []
+        for dirpath, dirnames, filenames in os.walk(corpus["content_dir"]):
+            sources.extend(os.path.join(dirpath, name) for name in filenames)
+        sources.sort()
+
+        timings = dict.fromkeys(STAGES, 0.0)
+        time_parser_stages(sources, timings)
+        time_generate_page(sources, corpus["template_path"], os.path.join(root, "pages"), timings)
+        time_main(corpus, root, jobs, timings)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "pages": pages,
+        "bytes": corpus["bytes"],
+        "corpus_seconds": generate_seconds,
+        "stages": {
+            stage: {
+                "seconds": seconds,
+                "us_per_page": seconds / pages * 1e6,
+                "mb_per_second": corpus["bytes"] / seconds / 1e6 if seconds else None,
+            }
+            for stage, seconds in timings.items()
+        },
+    }
+
+def print_table(result, baseline=None, out=sys.stderr):
+    print(f"\n{result['pages']} pages, {result['bytes'] / 1e6:.1f} MB of markdown", file=out)
+    previous = {}
+    if baseline:
+        for run in baseline.get("runs", []):
+            if run["pages"] == result["pages"]:
+                previous = run["stages"]
+    for stage, numbers in result["stages"].items():
+        line = f"  {stage:<22} {numbers['seconds']:>9.3f} s {numbers['us_per_page']:>10.1f} us/page"
+        if stage in previous and numbers["seconds"]:
+            line += f"   {previous[stage]['seconds'] / numbers['seconds']:>5.2f}x vs baseline"
+        print(line, file=out)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each build stage on a synthetic content corpus.")
+    parser.add_argument("--pages", default="10,100,1000", help="comma separated corpus sizes (up to 100000)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the corpus generator")
+    parser.add_argument("--mix", default="", help="block/inline weights, e.g. heading=2,list=4,code=0,image=3")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes for the full build stages")
+    parser.add_argument("--output", help="write results as JSON to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--workdir", help="directory for the generated corpora (default: system temp)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.pages.split(",")]
+    if any(size < 1 or size > 100000 for size in sizes):
+        parser.error("corpus sizes must be between 1 and 100000 pages")
+
+    mix = parse_mix(args.mix)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "mix": mix,
+            "jobs": args.jobs,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "runs": [],
+    }
+    for size in sizes:
+        result = run(size, args.seed, mix, args.jobs, args.workdir)
+        results["runs"].append(result)
+        print_table(result, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from node_helpers import MarkdownSyntaxError, iter_markdown_html, markdown_to_html_node
+
+MB = 1024 * 1024
+
+class Sink():
+    # Stands in for the links and plain text lists, so a 100 MB run does not
+    # hold millions of collected entries
+    def __init__(self):
+        self.count = 0
+
+    def append(self, item):
+        self.count += 1
+
+    def extend(self, items):
+        for item in items:
+            self.count += 1
+
+def repeat_line(unit, size):
+    # One line, so the whole document is a single paragraph
+    yield unit * (size // len(unit))
+
+def repeat_lines(unit, size):
+    # Many lines with no blank line between them, so they form one block
+    lines = unit.split("\n")
+    for i in range(size // (len(unit) + 1)):
+        yield from lines
+
+def heading_lines(unit, size):
+    # A heading with lines straight after it, so the whole block is one heading
+    yield "# h"
+    yield from repeat_lines(unit, size)
+
+def fenced(language, unit, size):
+    # One long line of code, highlighted as a single block
+    yield f"```{language}"
+    yield unit * (size // len(unit))
+    yield "```"
+
+# Inputs that used to make the parser redo work: long runs of markers that open
+# nothing, blocks with very many links, and code the highlighters could rescan
+CASES = {
+    "open brackets": lambda size: repeat_line("[", size),
+    "open images": lambda size: repeat_line("![", size),
+    "links without close": lambda size: repeat_line("[a](", size),
+    "nested brackets": lambda size: repeat_line("[[[]]](((", size),
+    "delimiters": lambda size: repeat_line("_a_ **b** `c` ", size),
+    "links per line": lambda size: repeat_lines("[a](/x) ![i](/y.png)", size),
+    "urls over lines": lambda size: repeat_lines("[a](/x\ny) z", size),
+    "heading lines": lambda size: heading_lines("[a](/x)", size),
+    "list items": lambda size: repeat_lines("- [a](/x) _b_", size),
+    "quote lines": lambda size: repeat_lines("> [q](/x) **b**", size),
+    "html word runs": lambda size: fenced("html", "a-b:", size),
+    "html open entities": lambda size: fenced("html", "&a", size),
+    "python open strings": lambda size: fenced("python", "'''x \"", size),
+    "shell open strings": lambda size: fenced("shell", "'a $", size),
+}
+
+def time_case(make, size):
+    links, text = Sink(), Sink()
+    start = time.perf_counter()
+    for fragment in iter_markdown_html(make(size), "/", links, text):
+        pass
+    return time.perf_counter() - start
+
+FUZZ_ALPHABET = "[]()!_*`#>-1. a\n"
+
+def fuzz(size, seed):
+    # Random blocks over the markdown metacharacters; each must either render or
+    # fail with a MarkdownSyntaxError, and the cost per byte must stay flat
+    rng = random.Random(seed)
+    done = errors = 0
+    start = time.perf_counter()
+    while done < size:
+        block = "".join(rng.choice(FUZZ_ALPHABET) for i in range(rng.randint(1, 4096)))
+        done += len(block)
+        try:
+            markdown_to_html_node(block, links=[], plain_text=[]).to_html()
+        except MarkdownSyntaxError:
+            errors += 1
+        except ValueError as e:
+            if "must have children" not in str(e):
+                raise  # an empty document is the only other expected failure
+    return time.perf_counter() - start, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that parse time grows linearly on adversarial markdown.")
+    parser.add_argument("--sizes", default="1,10,100", help="comma separated document sizes in MB")
+    parser.add_argument("--cases", help="comma separated subset of: " + ", ".join(CASES))
+    parser.add_argument("--fuzz", type=float, default=4, metavar="MB", help="MB of random blocks to fuzz (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the fuzzer")
+    parser.add_argument("--max-ratio", type=float, default=2.0,
+                        help="fail when the largest size costs this many times more per byte than the smallest")
+    args = parser.parse_args()
+
+    sizes = [int(float(size) * MB) for size in args.sizes.split(",")]
+    names = args.cases.split(",") if args.cases else list(CASES)
+    failed = []
+
+    print(f"{'case':<22}" + "".join(f"{f'{size / MB:g} MB':>12}" for size in sizes) + f"{'ratio':>8}")
+    for name in names:
+        per_byte = [time_case(CASES[name], size) / size for size in sizes]
+        ratio = per_byte[-1] / per_byte[0]
+        print(f"{name:<22}" + "".join(f"{cost * 1e9:>9.0f} ns" for cost in per_byte) + f"{ratio:>7.2f}x", flush=True)
+        if ratio > args.max_ratio:
+            failed.append(name)
+
+    if args.fuzz:
+        size = int(args.fuzz * MB)
+        seconds, errors = fuzz(size, args.seed)
+        print(f"fuzz: {size / MB:g} MB of random blocks in {seconds:.1f}s ({seconds / size * 1e9:.0f} ns/byte), "
+              f"{errors} rejected with a syntax error")
+
+    if failed:
+        raise SystemExit(f"per-byte cost grew more than {args.max_ratio}x for: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
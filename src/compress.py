@@ -0,0 +1,73 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from manifest import hash_bytes
+from profiler import Profiler
+from publish import publish_bytes
+
+COMPRESSIBLE_EXTENSIONS = frozenset({".html", ".css", ".js", ".svg", ".xml", ".json", ".txt"})
+# Below this the gzip header and a round trip for the sidecar cost more than they save
+DEFAULT_MIN_SIZE = 1024
+
+def find_compressible(public_dir, min_size=DEFAULT_MIN_SIZE):
+    found = []
+    for root, dirs, files in os.walk(public_dir):
+        for filename in files:
+            if filename.startswith("."):
+                continue  # build bookkeeping such as a shard manifest is not served
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(root, filename)
+            if os.path.getsize(path) >= min_size:
+                found.append(os.path.relpath(path, public_dir))
+    return sorted(found)
+
+def compress_file(public_dir, task):
+    relative_path, previous_hash = task
+    path = os.path.join(public_dir, relative_path)
+    gz_path = path + ".gz"
+    with open(path, "rb") as f:
+        data = f.read()
+    content_hash = hash_bytes(data)
+    if content_hash == previous_hash and os.path.isfile(gz_path):
+        return content_hash, False
+
+    # mtime=0 keeps the sidecar byte-identical for identical content
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    return content_hash, publish_bytes(gz_path, compressed)
+
+def precompress(public_dir, previous=None, min_size=DEFAULT_MIN_SIZE, jobs=1, profiler=None):
+    previous = previous or {}
+    profiler = profiler or Profiler()
+    found = find_compressible(public_dir, min_size)
+    tasks = [(relative_path, previous.get(relative_path)) for relative_path in found]
+
+    task_fn = partial(compress_file, public_dir)
+    if jobs <= 1 or len(tasks) <= 1:
+        results = list(map(task_fn, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(task_fn, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+    compressed = {}
+    written = 0
+    for relative_path, (content_hash, wrote) in zip(found, results):
+        compressed[relative_path] = content_hash
+        if wrote:
+            written += 1
+            profiler.add_bytes("compress", os.path.getsize(os.path.join(public_dir, relative_path) + ".gz"))
+
+    # Sidecars of deleted files, or of files that shrank below the threshold
+    removed = remove_sidecars(public_dir, set(previous) - set(compressed))
+    print(f"Compressed: {written} written, {len(found) - written} unchanged, {removed} removed")
+    return compressed
+
+def remove_sidecars(public_dir, relative_paths):
+    removed = 0
+    for relative_path in sorted(relative_paths):
+        gz_path = os.path.join(public_dir, relative_path + ".gz")
+        if os.path.isfile(gz_path):
+            os.remove(gz_path)
+            removed += 1
+    return removed
@@ -0,0 +1,69 @@
+import os
+
+# Inputs that are not files, such as build options, are named with this prefix
+OPTION_PREFIX = "option:"
+
+# A page's metadata is an input of its own, so listings do not rebuild when only a body changes
+META_PREFIX = "meta:"
+
+def option_node(name):
+    return OPTION_PREFIX + name
+
+def meta_node(source_rel):
+    return META_PREFIX + source_rel.replace(os.sep, "/")
+
+class DependencyGraph():
+    def __init__(self, data=None):
+        # output -> inputs it was built from, and the reverse index input -> outputs
+        self.inputs = {}
+        self.dependents = {}
+        for output, inputs in (data or {}).items():
+            self.set_inputs(output, inputs)
+
+    def __contains__(self, output):
+        return output in self.inputs
+
+    def inputs_of(self, output):
+        return sorted(self.inputs.get(output, ()))
+
+    def set_inputs(self, output, inputs):
+        self.remove_output(output)
+        self.inputs[output] = set(inputs)
+        for node in self.inputs[output]:
+            self.dependents.setdefault(node, set()).add(output)
+
+    def remove_output(self, output):
+        for node in self.inputs.pop(output, ()):
+            outputs = self.dependents[node]
+            outputs.discard(output)
+            if not outputs:
+                del self.dependents[node]
+
+    def retain(self, outputs):
+        for output in set(self.inputs) - set(outputs):
+            self.remove_output(output)
+
+    def affected(self, changed):
+        # Outputs can be inputs of other outputs (listings, includes), so follow them transitively
+        affected = set()
+        pending = list(changed)
+        while pending:
+            for output in self.dependents.get(pending.pop(), ()):
+                if output not in affected:
+                    affected.add(output)
+                    pending.append(output)
+        return sorted(affected)
+
+    def to_data(self):
+        return {output: sorted(inputs) for output, inputs in sorted(self.inputs.items())}
+
+def explain(graph, path):
+    node = path if path.startswith((OPTION_PREFIX, META_PREFIX)) else os.path.normpath(path)
+    lines = []
+    if node in graph:
+        lines.append(f"{node} is built from:")
+        lines.extend(f"  {input_node}" for input_node in graph.inputs_of(node))
+    affected = graph.affected([node])
+    lines.append(f"Changing {node} rebuilds {len(affected)} output(s)" + (":" if affected else ""))
+    lines.extend(f"  {output}" for output in affected)
+    return "\n".join(lines)
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+from node_helpers import PARSER_VERSION
+from highlight import HIGHLIGHTER_VERSION
+from publish import temp_path
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class FragmentCache():
+    def __init__(self, directory, max_bytes = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, markdown, basepath = None):
+        # basepath is part of the key because it is applied while the fragment is serialized,
+        # the highlighter version because highlighted code is baked into the fragment
+        digest = hashlib.sha256(f"{PARSER_VERSION}\0{HIGHLIGHTER_VERSION}\0{basepath or ''}\0".encode("utf-8"))
+        digest.update(markdown.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # Bumping the mtime is what makes eviction least-recently-used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key, entry):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a unique name first so concurrent workers never see half an
+        # entry; a put follows a miss, so comparing with an existing file is not worth it
+        tmp_path = temp_path(path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.directory):
+            for filename in files:
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+
+        evicted = 0
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        return evicted
@@ -0,0 +1,76 @@
+import datetime
+import io
+
+FENCE = "---"
+# Front matter is a handful of lines; a header larger than this is a missing closing fence
+MAX_HEADER_BYTES = 16 * 1024
+BOOLEANS = {"true": True, "yes": True, "false": False, "no": False}
+
+class FrontMatterError(ValueError):
+    pass
+
+def parse_value(key, value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        value = value[1:-1]
+    if key == "tags":
+        if value.startswith("[") and value.endswith("]"):
+            value = value[1:-1]
+        return [tag.strip().strip("\"'") for tag in value.split(",") if tag.strip()]
+    if key == "draft":
+        if value.lower() not in BOOLEANS:
+            raise FrontMatterError(f"draft must be true or false, got {value!r}")
+        return BOOLEANS[value.lower()]
+    if key == "date":
+        try:
+            # Kept as the ISO string so the metadata stays plain JSON
+            return datetime.date.fromisoformat(value).isoformat()
+        except ValueError:
+            raise FrontMatterError(f"date must look like YYYY-MM-DD, got {value!r}") from None
+    return value
+
+def parse_front_matter(lines):
+    # Returns the metadata and how many lines the header takes up, reading no
+    # further than the closing fence. A leading --- without a closing fence, or
+    # with lines that are not key: value, is left in the body as ordinary markdown
+    lines = iter(lines)
+    first = next(lines, "")
+    if first.rstrip("\r\n") != FENCE:
+        return {}, 0
+
+    meta = {}
+    consumed = len(first)
+    for line_number, line in enumerate(lines, 2):
+        consumed += len(line)
+        if consumed > MAX_HEADER_BYTES:
+            break
+        line = line.rstrip("\r\n")
+        if line == FENCE:
+            return meta, line_number
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        key, sep, value = line.partition(":")
+        if not sep:
+            return {}, 0
+        key = key.strip().lower()
+        meta[key] = parse_value(key, value)
+    return {}, 0
+
+def read_front_matter(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_front_matter(f)
+
+def split_front_matter(text):
+    if not text.startswith(FENCE):
+        return {}, text
+    meta, header_lines = parse_front_matter(io.StringIO(text))
+    if not header_lines:
+        return meta, text
+    # The header is swapped for the same number of empty lines, so line numbers in
+    # the body still match the file and the block parser simply skips them
+    body = text.split("\n", header_lines)[-1] if text.count("\n") >= header_lines else ""
+    return meta, "\n" * header_lines + body
+
+def blank_front_matter(lines, header_lines):
+    for line_number, line in enumerate(lines, 1):
+        yield "\n" if line_number <= header_lines else line
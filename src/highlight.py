@@ -0,0 +1,144 @@
+import hashlib
+import html
+import re
+from functools import lru_cache
+
+# Bump when the markup for the same code changes, so cached results are not reused
+HIGHLIGHTER_VERSION = 2
+
+# Every rule is (css class, pattern). The patterns of a language are tried
+# together as one alternation and text no rule matches is left plain. Rules
+# with a None class match runs of word characters only so they are skipped as
+# a whole; without one, a rule that starts at every word boundary inside a
+# long run would rescan the rest of the run from each of them. Unclosed strings
+# and comments run to the end of the line or the code instead of failing.
+
+PYTHON_KEYWORDS = (
+    "False None True and as assert async await break class continue def del elif else except finally for from "
+    "global if import in is lambda match case nonlocal not or pass raise return try while with yield"
+)
+PYTHON_BUILTINS = (
+    "abs all any bool bytes callable dict dir enumerate filter float format getattr hasattr hash int isinstance "
+    "issubclass iter len list map max min next object open print range repr reversed round set setattr slice "
+    "sorted str sum super tuple type vars zip self cls"
+)
+SHELL_KEYWORDS = "if then else elif fi for in do done case esac while until function select return break continue"
+SHELL_BUILTINS = (
+    "alias bg cd command echo eval exec exit export fg jobs kill local printf pwd read readonly set shift source "
+    "test trap type ulimit umask unset wait"
+)
+
+def words(names, word=r"\w"):
+    # word is what counts as part of a word, so "test" is not matched in "test.sh"
+    return f"(?<!{word})(?:" + "|".join(names.split()) + f")(?!{word})"
+
+RULES = {
+    "python": [
+        ("hl-comment", r"#[^\n]*"),
+        ("hl-string", r"(?i:[rbuf]{0,2})(?:'''[\s\S]*?(?:'''|\Z)|\"\"\"[\s\S]*?(?:\"\"\"|\Z)"
+                      r"|'(?:\\.|[^'\\\n])*'?|\"(?:\\.|[^\"\\\n])*\"?)"),
+        ("hl-deco", r"^[ \t]*@[\w.]+"),
+        ("hl-keyword", words(PYTHON_KEYWORDS)),
+        ("hl-builtin", words(PYTHON_BUILTINS)),
+        ("hl-number", r"\b(?:0[xob][\da-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b"),
+        (None, r"\w+"),
+    ],
+    "shell": [
+        ("hl-comment", r"(?:^|(?<=\s))#[^\n]*"),
+        ("hl-string", r"'[^'\n]*'?|\"(?:\\.|[^\"\\\n])*\"?"),
+        ("hl-var", r"\$(?:\{[^}\n]*\}?|\w+|[@*#?$!-])"),
+        ("hl-keyword", words(SHELL_KEYWORDS, r"[\w./-]")),
+        ("hl-builtin", words(SHELL_BUILTINS, r"[\w./-]")),
+        ("hl-attr", r"(?<![\w-])--?[A-Za-z][\w-]*"),
+        (None, r"[\w./-]+"),
+    ],
+    "json": [
+        ("hl-attr", r"\"(?:\\.|[^\"\\\n])*\"(?=[ \t]*:)"),
+        ("hl-string", r"\"(?:\\.|[^\"\\\n])*\"?"),
+        ("hl-number", r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+        ("hl-keyword", r"\b(?:true|false|null)\b"),
+    ],
+    "html": [
+        ("hl-comment", r"<!--[\s\S]*?(?:-->|\Z)"),
+        ("hl-keyword", r"<![^>\n]*>?"),
+        ("hl-tag", r"</?[A-Za-z][\w:-]*|/?>"),
+        # The lookahead and backreference make the run atomic: it is matched once
+        # and never retried shorter when no "=" follows
+        ("hl-attr", r"(?<![\w:-])(?=(?P<attr>[\w:-]+))(?P=attr)(?==)"),
+        ("hl-string", r"(?<==)(?:\"[^\"\n]*\"?|'[^'\n]*'?)"),
+        ("hl-var", r"&#?\w+;"),
+        (None, r"[\w:-]+"),
+    ],
+}
+
+ALIASES = {
+    "py": "python", "python3": "python",
+    "sh": "shell", "bash": "shell", "zsh": "shell", "console": "shell", "shell-session": "shell",
+    "xml": "html", "svg": "html",
+}
+
+def compile_rules(rules):
+    # Maps the number of each rule's outer group to its class; rules may have
+    # groups of their own, which shift the numbers of the rules after them
+    pattern = "|".join(f"({rule})" for css_class, rule in rules)
+    classes = {}
+    group = 1
+    for css_class, rule in rules:
+        classes[group] = css_class
+        group += 1 + re.compile(rule).groups
+    return re.compile(pattern, re.MULTILINE), classes
+
+LEXERS = {language: compile_rules(rules) for language, rules in RULES.items()}
+
+def language_name(language):
+    language = language.lower()
+    return ALIASES.get(language, language)
+
+def highlight(language, code):
+    # Returns the escaped, highlighted HTML for code, or None when the
+    # language has no highlighter
+    lexer = LEXERS.get(language_name(language))
+    if lexer is None:
+        return None
+    pattern, classes = lexer
+    parts = []
+    plain_start = 0
+    for match in pattern.finditer(code):
+        css_class = classes[match.lastindex]
+        if css_class is None:
+            continue  # matched only so words are not split, stays in the plain run
+        if match.start() > plain_start:
+            parts.append(html.escape(code[plain_start:match.start()], quote=False))
+        parts.append(f'<span class="{css_class}">{html.escape(match.group(), quote=False)}</span>')
+        plain_start = match.end()
+    parts.append(html.escape(code[plain_start:], quote=False))
+    return "".join(parts)
+
+def cache_key(language, code):
+    digest = hashlib.sha256(f"highlight\0{HIGHLIGHTER_VERSION}\0{language_name(language)}\0".encode("utf-8"))
+    digest.update(code.encode("utf-8"))
+    return digest.hexdigest()
+
+@lru_cache(maxsize=1024)
+def highlight_memo(language, code):
+    # The same samples recur across pages; this keeps them for the life of the process
+    return highlight(language, code)
+
+def highlighter(cache=None):
+    # With a persistent cache (anything with get/put by key, e.g. the fragment
+    # cache) results are shared between builds and worker processes as well
+    if cache is None:
+        return highlight_memo
+
+    def highlight_cached(language, code):
+        if language_name(language) not in LEXERS:
+            return None
+        key = cache_key(language, code)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["html"]
+        result = highlight_memo(language, code)
+        cache.put(key, {"html": result})
+        return result
+
+    return highlight_cached
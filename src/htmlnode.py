@@ -1,12 +1,54 @@
+import sys
+from collections.abc import Mapping
+
+class EmptyProps(Mapping):
+	# Read-only so no node can leak attributes into the others, and pickled by
+	# name so nodes sent to worker processes or deep-copied keep sharing it
+	__slots__ = ()
+
+	def __getitem__(self, key):
+		raise KeyError(key)
+
+	def __iter__(self):
+		return iter(())
+
+	def __len__(self):
+		return 0
+
+	def __repr__(self):
+		return "{}"
+
+	def __reduce__(self):
+		return "EMPTY_PROPS"
+
+# Shared by every node created without props
+EMPTY_PROPS = EmptyProps()
+
+# Attributes holding URLs that get the site basepath prepended when root-relative
+URL_PROPS = frozenset({"href", "src"})
+
+def intern_tag(tag):
+	return sys.intern(tag) if type(tag) is str else tag
+
 class HTMLNode():
+	__slots__ = ("tag", "value", "children", "props")
+
 	def __init__(self, tag = None, value = None, children = None, props = None):
-		self.tag = tag
+		self.tag = intern_tag(tag)
 		self.value = value
 		self.children = children
 		self.props = props
 
 	def __eq__(self, other):
-		return
+		if not isinstance(other, HTMLNode):
+			return False
+		return (
+			type(self) is type(other)
+			and self.tag == other.tag
+			and self.value == other.value
+			and self.children == other.children
+			and self.props == other.props
+		)
 
 	def __repr__(self):
 		return (
@@ -18,11 +60,19 @@ class HTMLNode():
 			f")"
 		)
 
-	def to_html(self):
+	def to_html(self, basepath = None):
 		raise NotImplementedError()
 
-	def props_to_html(self):
+	def write_html(self, write, basepath = None):
+		write(self.to_html(basepath))
+
+	def props_to_html(self, basepath = None):
+		if not self.props:
+			return ""
 		prop_string = ""
 		for key, value in self.props.items():
+			# "//host/path" is protocol-relative and points at another site
+			if basepath and key in URL_PROPS and value.startswith("/") and not value.startswith("//"):
+				value = basepath + value[1:]
 			prop_string += f' {key}="{value}"'
 		return prop_string
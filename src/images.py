@@ -0,0 +1,102 @@
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from manifest import hash_file
+from publish import publish_bytes
+
+# Bump when optimize_png output changes so cached derivatives are rebuilt
+OPTIMIZER_VERSION = 1
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CRITICAL_CHUNKS = {b"IHDR", b"PLTE", b"IDAT", b"IEND"}
+# Ancillary chunks that change how the pixels look are kept; text, time,
+# physical size and the like are stripped
+KEPT_ANCILLARY_CHUNKS = {b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP", b"sBIT"}
+ANIMATION_CHUNKS = {b"acTL", b"fcTL", b"fdAT"}
+
+def read_chunks(data):
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG file")
+
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        if pos + 8 > len(data):
+            raise ValueError("truncated PNG chunk header")
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        end = pos + 12 + length
+        if end > len(data):
+            raise ValueError(f"truncated PNG chunk {chunk_type!r}")
+        chunks.append((chunk_type, data[pos + 8:pos + 8 + length]))
+        pos = end
+        if chunk_type == b"IEND":
+            break
+    return chunks
+
+def write_chunk(chunk_type, body):
+    crc = zlib.crc32(chunk_type + body) & 0xffffffff
+    return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(">I", crc)
+
+def optimize_png(data, level=9):
+    chunks = read_chunks(data)
+    types = {chunk_type for chunk_type, body in chunks}
+    if b"IDAT" not in types or types & ANIMATION_CHUNKS:
+        return data  # APNG frames carry their own compressed data, leave those alone
+
+    # Filter bytes are kept as they are, so this is a lossless recompression
+    raw = zlib.decompress(b"".join(body for chunk_type, body in chunks if chunk_type == b"IDAT"))
+    candidates = []
+    for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, 9, strategy)
+        candidates.append(compressor.compress(raw) + compressor.flush())
+    idat = min(candidates, key=len)
+
+    out = [PNG_SIGNATURE]
+    wrote_idat = False
+    for chunk_type, body in chunks:
+        if chunk_type == b"IDAT":
+            if not wrote_idat:
+                out.append(write_chunk(b"IDAT", idat))
+                wrote_idat = True
+        elif chunk_type in CRITICAL_CHUNKS or chunk_type in KEPT_ANCILLARY_CHUNKS:
+            out.append(write_chunk(chunk_type, body))
+
+    optimized = b"".join(out)
+    return optimized if len(optimized) < len(data) else data
+
+def cached_path(cache_dir, source_hash):
+    return os.path.join(cache_dir, f"{source_hash}-v{OPTIMIZER_VERSION}.png")
+
+def atomic_copy(src_path, dst_path):
+    # Published as a new file, so a hardlinked output never changes its source
+    with open(src_path, "rb") as f:
+        publish_bytes(dst_path, f.read())
+
+def optimize_file(cache_dir, pair):
+    src_path, dst_path = pair
+    source_size = os.path.getsize(src_path)
+    derivative = cached_path(cache_dir, hash_file(src_path))
+    cached = os.path.exists(derivative)
+
+    if not cached:
+        with open(src_path, "rb") as f:
+            data = f.read()
+        try:
+            optimized = optimize_png(data)
+        except (ValueError, zlib.error):
+            optimized = data  # not a PNG we can read, publish it unchanged
+
+        os.makedirs(cache_dir, exist_ok=True)
+        publish_bytes(derivative, optimized)
+
+    atomic_copy(derivative, dst_path)
+    return source_size, os.path.getsize(dst_path), cached
+
+def optimize_images(pairs, cache_dir, jobs=1):
+    task_fn = partial(optimize_file, cache_dir)
+    if jobs <= 1 or len(pairs) <= 1:
+        return list(map(task_fn, pairs))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(task_fn, pairs))
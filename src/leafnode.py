@@ -1,8 +1,13 @@
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, EMPTY_PROPS
+
+# HTML void elements that should not have closing tags
+VOID_TAGS = frozenset({"img", "br", "hr", "input", "meta", "link"})
 
 class LeafNode(HTMLNode):
+	__slots__ = ()
+
 	def __init__(self, tag = None, value = None, props = None):
-		super().__init__(tag, value, None, props or {})
+		super().__init__(tag, value, None, props or EMPTY_PROPS)
 
 	def __eq__(self, other):
 		if not isinstance(other, LeafNode):
@@ -18,24 +23,21 @@ class LeafNode(HTMLNode):
 			f"LeafNode(\n"
 			f"  tag={self.tag!r},\n"
 			f"  value={self.value!r},\n"
-			f"  props={self.props!r}\n"
+			f"  props={dict(self.props)!r}\n"
 			f")"
 		)
 
 
-	def to_html(self):
+	def to_html(self, basepath = None):
 		if self.value is None and self.tag != "img":
 			raise ValueError("LeafNode must have a value unless it is an <img> tag.")
 
 		if self.tag is None:
 			return self.value
 
-		prop_str = self.props_to_html()
-
-		# HTML void elements that should not have closing tags
-		void_tags = {"img", "br", "hr", "input", "meta", "link"}
+		prop_str = self.props_to_html(basepath)
 
-		if self.tag in void_tags:
+		if self.tag in VOID_TAGS:
 			return f"<{self.tag}{prop_str}>"
 
 		return f"<{self.tag}{prop_str}>{self.value}</{self.tag}>"
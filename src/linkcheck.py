@@ -0,0 +1,48 @@
+import os
+import posixpath
+import re
+from urllib.parse import unquote
+
+EXTERNAL_URL_PATTERN = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//)")
+
+class BrokenLinksError(Exception):
+    def __init__(self, broken):
+        self.broken = broken
+        super().__init__(f"{len(broken)} broken link(s):\n" + "\n".join(format_broken(*link) for link in broken))
+
+def format_broken(source, line, url):
+    return f"  {source}:{line}: {url}"
+
+def output_index(relative_paths):
+    # Forward slashes regardless of platform, so lookups match URL paths directly
+    return {relative_path.replace(os.sep, "/") for relative_path in relative_paths}
+
+def link_target(url, page_output):
+    url = url.split("#", 1)[0].split("?", 1)[0]
+    if not url or EXTERNAL_URL_PATTERN.match(url):
+        return None  # in-page anchors and other sites are not ours to check
+    url = unquote(url)
+    if url.startswith("/"):
+        path = url
+    else:
+        path = posixpath.join("/", posixpath.dirname(page_output.replace(os.sep, "/")), url)
+    target = posixpath.normpath(path).lstrip("/")
+    return target + "/" if url.endswith("/") and target else target
+
+def target_exists(target, outputs):
+    if target in outputs:
+        return True
+    directory = target.rstrip("/")
+    # /blog/post can be served by blog/post/index.html or blog/post.html
+    return posixpath.join(directory, "index.html") in outputs or (directory + ".html") in outputs
+
+def find_broken_links(pages, outputs):
+    # pages: source -> (output path, [(line, url), ...])
+    broken = []
+    for source in sorted(pages):
+        page_output, links = pages[source]
+        for line, url in links:
+            target = link_target(url, page_output)
+            if target is not None and not target_exists(target, outputs):
+                broken.append((source, line, url))
+    return broken
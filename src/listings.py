@@ -0,0 +1,150 @@
+import datetime
+import email.utils
+import html
+import os
+from xml.sax.saxutils import escape as xml_escape
+from depgraph import meta_node, option_node
+from leafnode import LeafNode
+from manifest import hash_file, hash_options
+from parentnode import ParentNode
+from publish import publish_text
+from search import page_url
+from template import Template
+
+BLOG_INDEX = "index.html"
+SITEMAP = "sitemap.xml"
+FEED = "feed.xml"
+FEED_ITEMS = 20
+
+def find_posts(pages, blog_dir="blog"):
+    prefix = blog_dir.strip("/") + "/"
+    posts = [
+        (source_rel, entry) for source_rel, entry in pages.items()
+        if source_rel.replace(os.sep, "/").startswith(prefix) and entry["output"].replace(os.sep, "/") != prefix + BLOG_INDEX
+    ]
+    # Newest first; undated posts go last, by title
+    posts.sort(key=lambda post: post[1]["meta"].get("title", ""))
+    posts.sort(key=lambda post: post[1]["meta"].get("date", ""), reverse=True)
+    return posts
+
+def blog_index_html(posts, basepath=None):
+    items = []
+    for source_rel, entry in posts:
+        meta = entry["meta"]
+        children = [LeafNode("a", html.escape(meta["title"]), {"href": page_url(entry["output"])})]
+        if "date" in meta:
+            children += [LeafNode(None, " "), LeafNode("time", meta["date"], {"datetime": meta["date"]})]
+        if meta.get("tags"):
+            children.append(LeafNode("span", " " + html.escape(", ".join(meta["tags"])), {"class": "tags"}))
+        items.append(ParentNode("li", children))
+    root = ParentNode("div", [LeafNode("h1", "Blog"), ParentNode("ul", items)] if items else [LeafNode("h1", "Blog")])
+    return root.to_html(basepath)
+
+def sitemap_xml(pages, site_url, basepath=None):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for source_rel in sorted(pages):
+        entry = pages[source_rel]
+        lines.append(f"  <url><loc>{xml_escape(site_url.rstrip('/') + page_url(entry['output'], basepath))}</loc>")
+        if "date" in entry["meta"]:
+            lines.append(f"    <lastmod>{entry['meta']['date']}</lastmod>")
+        lines.append("  </url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+def rss_date(iso_date):
+    day = datetime.date.fromisoformat(iso_date)
+    return email.utils.format_datetime(datetime.datetime(day.year, day.month, day.day, tzinfo=datetime.timezone.utc))
+
+def feed_xml(posts, site_url, basepath=None, title="Blog"):
+    site = site_url.rstrip("/") + page_url("index.html", basepath)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0">',
+        "<channel>",
+        f"  <title>{xml_escape(title)}</title>",
+        f"  <link>{xml_escape(site)}</link>",
+        f"  <description>{xml_escape(title)}</description>",
+    ]
+    dated = [(source_rel, entry) for source_rel, entry in posts if "date" in entry["meta"]][:FEED_ITEMS]
+    for source_rel, entry in dated:
+        link = xml_escape(site_url.rstrip("/") + page_url(entry["output"], basepath))
+        lines += [
+            "  <item>",
+            f"    <title>{xml_escape(entry['meta']['title'])}</title>",
+            f"    <link>{link}</link>",
+            f"    <guid>{link}</guid>",
+            f"    <pubDate>{rss_date(entry['meta']['date'])}</pubDate>",
+        ]
+        lines += [f"    <category>{xml_escape(tag)}</category>" for tag in entry["meta"].get("tags", ())]
+        lines.append("  </item>")
+    lines += ["</channel>", "</rss>"]
+    return "\n".join(lines) + "\n"
+
+def write_text(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    publish_text(path, text)
+
+def generate_listings(manifest, public_dir, template_path, basepath=None, site_url=None, previous_inputs=None,
+                      blog_dir=None):
+    # blog_dir enables the post listing, site_url the sitemap and feed
+    # Built from the metadata index only, so no page is read or rendered again.
+    # previous_inputs are the input hashes from before this build's pages were recorded.
+    previous_inputs = previous_inputs or {}
+    pages = manifest.pages
+    posts = find_posts(pages, blog_dir) if blog_dir else []
+    page_outputs = {entry["output"].replace(os.sep, "/") for entry in pages.values()}
+
+    template_node = os.path.normpath(template_path)
+    hashes = {
+        template_node: hash_file(template_path),
+        option_node("basepath"): hash_options({"basepath": basepath}),
+        option_node("site_url"): hash_options({"site_url": site_url}),
+    }
+    for source_rel, entry in pages.items():
+        hashes[meta_node(source_rel)] = hash_options({"output": entry["output"], "meta": entry["meta"]})
+    post_nodes = [meta_node(source_rel) for source_rel, entry in posts]
+    site_nodes = [option_node("site_url"), option_node("basepath")]
+
+    def render_blog_index():
+        template = Template.load(template_path, basepath)
+        return template.render(Title="Blog", Content=blog_index_html(posts, basepath))
+
+    outputs = []
+    blog_index = (blog_dir or "blog").strip("/") + "/" + BLOG_INDEX
+    if posts and blog_index not in page_outputs:
+        outputs.append((blog_index, [*post_nodes, template_node, option_node("basepath")], render_blog_index))
+    if site_url:
+        sitemap_nodes = [meta_node(source_rel) for source_rel in pages] + site_nodes
+        outputs.append((SITEMAP, sitemap_nodes, lambda: sitemap_xml(pages, site_url, basepath)))
+        if posts:
+            outputs.append((FEED, post_nodes + site_nodes, lambda: feed_xml(posts, site_url, basepath)))
+
+    written = []
+    for output_rel, inputs, render in outputs:
+        output_path = os.path.join(public_dir, *output_rel.split("/"))
+        output_node = os.path.normpath(output_path)
+        current = (
+            output_node in manifest.graph
+            and manifest.graph.inputs_of(output_node) == sorted(inputs)
+            and all(previous_inputs.get(node) == hashes[node] for node in inputs)
+            and os.path.isfile(output_path)
+        )
+        if not current:
+            write_text(output_path, render())
+            manifest.graph.set_inputs(output_node, inputs)
+            written.append(output_rel)
+
+    # Listings that no longer apply, such as a feed after --site-url is dropped
+    kept = {os.path.normpath(os.path.join(public_dir, *output_rel.split("/"))) for output_rel, inputs, render in outputs}
+    for output_rel in (blog_index, SITEMAP, FEED):
+        output_path = os.path.join(public_dir, *output_rel.split("/"))
+        output_node = os.path.normpath(output_path)
+        if output_node in manifest.graph and output_node not in kept:
+            manifest.graph.remove_output(output_node)
+            if os.path.isfile(output_path):
+                os.remove(output_path)
+
+    manifest.record_inputs(hashes)
+    if outputs:
+        print(f"Listings: {len(written)} written, {len(outputs) - len(written)} unchanged")
+    return [output_rel for output_rel, inputs, render in outputs]
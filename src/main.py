@@ -1,16 +1,139 @@
-import sys
+import argparse
+import logging
 import os
-from main_helpers import clear_directory, copy_dir, generate_pages_recursive
+from main_helpers import build_site, check_links
+from listings import generate_listings
+from manifest import Manifest
+from depgraph import explain
+from shard import merge_shards, parse_shard, shard_manifest_path
+from fragment_cache import FragmentCache
+from profiler import Profiler, run_with_capture
+from watch import serve_and_watch
+
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site from markdown content.")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served under")
+    parser.add_argument("--clean", action="store_true", help="wipe the output directory and rebuild every page")
+    parser.add_argument("--manifest", help="path of the incremental build manifest (default: .cache/manifest.json, or inside the output with --shard)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes used to render pages (0 = one per CPU)")
+    parser.add_argument("--static-compare", choices=["mtime", "hash"], default="mtime",
+                        help="how static files are checked for changes (size and mtime, or content hash)")
+    parser.add_argument("--link-static", action="store_true",
+                        help="hardlink static files into the output instead of copying when on the same filesystem")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every generated page and copied file")
+    parser.add_argument("--profile", action="store_true", help="print per-phase timings and the slowest pages after the build")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest pages to list with --profile")
+    parser.add_argument("--cprofile", metavar="FILE", help="run the build under cProfile and dump the stats to FILE (main process only)")
+    parser.add_argument("--tracemalloc", action="store_true", help="trace allocations and report the peak and top sites (main process only)")
+    parser.add_argument("--watch", action="store_true", help="serve the output and rebuild whenever content, static files or the template change")
+    parser.add_argument("--port", type=int, default=8888, help="port for the --watch dev server")
+    parser.add_argument("--cache-dir", default=os.path.join(".cache", "fragments"),
+                        help="directory of rendered fragments reused across builds, branches and site variants")
+    parser.add_argument("--cache-size", type=int, default=256, metavar="MB", help="size cap of the fragment cache, oldest entries are evicted first")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the fragment cache")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="overlap reads and writes with rendering on I/O threads, for slow or network filesystems (replaces --jobs)")
+    parser.add_argument("--io-threads", type=positive_int, default=4, help="threads per I/O stage with --pipeline")
+    parser.add_argument("--queue-depth", type=positive_int, default=16, help="pages buffered on each side of the render stage with --pipeline")
+    parser.add_argument("--optimize-images", action="store_true",
+                        help="recompress static PNGs losslessly and strip metadata chunks, using --jobs processes")
+    parser.add_argument("--image-cache-dir", default=os.path.join(".cache", "images"),
+                        help="directory of optimized images, keyed by source hash so each image is only optimized once")
+    parser.add_argument("--gzip", action="store_true",
+                        help="write precompressed .gz files next to HTML, CSS and other text outputs, using --jobs processes")
+    parser.add_argument("--gzip-min-size", type=int, default=1024, metavar="BYTES", help="smallest file that gets a .gz with --gzip")
+    parser.add_argument("--search", action="store_true",
+                        help="write a client-side search index to search/ in the output, updated only for changed pages")
+    parser.add_argument("--drafts", action="store_true", help="also build pages whose front matter sets draft: true")
+    parser.add_argument("--listings", metavar="DIR", nargs="?", const="blog",
+                        help="write an index page listing the posts under DIR (default: blog), from front matter only")
+    parser.add_argument("--site-url", help="public origin of the site, e.g. https://example.com; enables sitemap.xml, and feed.xml with --listings")
+    parser.add_argument("--strict-links", action="store_true", help="fail the build when a page links to a path the site does not produce")
+    parser.add_argument("--explain", metavar="PATH",
+                        help="print what PATH is built from and what a change to it rebuilds, using the last build's manifest, then exit")
+    parser.add_argument("--output", default="docs", help="directory the site is written to (default: docs, or shards/I-of-N with --shard)")
+    parser.add_argument("--shard", type=shard_arg, metavar="I/N", help="build only the I-th of N slices of the pages, for spreading a build over N machines")
+    parser.add_argument("--merge", nargs="+", metavar="DIR", help="combine the outputs of sharded builds into --output, then exit")
+    args = parser.parse_args(argv)
+    if args.shard and args.merge:
+        parser.error("--shard and --merge cannot be combined")
+    if args.shard and args.search:
+        parser.error("--search needs every page and cannot be combined with --shard")
+    if args.shard and args.output == "docs":
+        args.output = os.path.join("shards", f"{args.shard[0]}-of-{args.shard[1]}")
+    if args.manifest is None:
+        args.manifest = shard_manifest_path(args.output) if args.shard else os.path.join(".cache", "manifest.json")
+    return args
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    args = parse_args()
     content_dir = "content"
-    public_dir = "docs"
+    public_dir = args.output
     static_dir = "static"
     template_path = "template.html"
 
-    clear_directory(public_dir)
-    copy_dir(static_dir, public_dir)
-    generate_pages_recursive(content_dir, template_path, public_dir, basepath)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    manifest = Manifest.load(args.manifest)
+    if args.explain:
+        print(explain(manifest.graph, args.explain))
+        return
+    if args.merge:
+        merge_shards(args.merge, public_dir, manifest, content_dir, args.basepath)
+        # Listings and links need every page, so they are done on the merged tree
+        listings = generate_listings(manifest, public_dir, template_path, args.basepath, args.site_url, None, args.listings)
+        manifest.save()
+        check_links(manifest, content_dir, args.strict_links, listings)
+        return
+
+    fragment_cache = None if args.no_cache else FragmentCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    def build(clean=args.clean):
+        # A fresh profiler per build keeps watch-mode rebuild numbers separate
+        profiler = Profiler()
+        build_site(content_dir, static_dir, public_dir, template_path,
+                   basepath=args.basepath,
+                   manifest=manifest,
+                   clean=clean,
+                   jobs=args.jobs or os.cpu_count(),
+                   static_compare=args.static_compare,
+                   link_static=args.link_static,
+                   profiler=profiler,
+                   fragment_cache=fragment_cache,
+                   io_threads=args.io_threads if args.pipeline else 0,
+                   queue_depth=args.queue_depth,
+                   image_cache_dir=args.image_cache_dir if args.optimize_images else None,
+                   gzip_min_size=args.gzip_min_size if args.gzip else None,
+                   shard=args.shard,
+                   strict_links=args.strict_links,
+                   search=args.search,
+                   drafts=args.drafts,
+                   blog_dir=args.listings,
+                   site_url=args.site_url)
+        return profiler
+
+    if args.watch:
+        # Only the first build honours --clean; rebuilds are incremental
+        builds = iter([args.clean])
+        serve_and_watch(lambda: build(next(builds, False)), public_dir, [content_dir, static_dir, template_path], args.port)
+        return
+
+    profiler = run_with_capture(build, args.cprofile, args.tracemalloc)
+
+    if args.profile:
+        print(profiler.report(args.profile_top))
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,27 @@
 import re
 import os
+import hashlib
 import shutil
-from node_helpers import markdown_to_html_node
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from node_helpers import PARSER_VERSION, markdown_to_html_node, iter_markdown_html
+from manifest import hash_file, hash_options
+from depgraph import option_node
+from template import Template
+from profiler import Profiler
+from pipeline import run_pipeline
+from images import optimize_images
+from compress import precompress, remove_sidecars
+from search import SearchIndex, page_url
+from frontmatter import FrontMatterError, blank_front_matter, parse_front_matter, read_front_matter, split_front_matter
+from listings import generate_listings
+from linkcheck import BrokenLinksError, find_broken_links, format_broken, output_index
+from publish import publish_stream, publish_text, temp_path
+from highlight import HIGHLIGHTER_VERSION, highlighter
+
+logger = logging.getLogger(__name__)
 
 def clear_directory(directory):
     for filename in os.listdir(directory):
@@ -11,15 +31,15 @@ def clear_directory(directory):
         elif os.path.isdir(file_path):
             shutil.rmtree(file_path)
 
-def copy_dir(source_dir, target_dir):
-    print("Current working directory:", os.getcwd())
-    
+def copy_dir(source_dir, target_dir, clear=True):
+    logger.info("Current working directory: %s", os.getcwd())
+
     if not os.path.exists(source_dir):
-        print(f"Source directory '{source_dir}' does not exist.")
+        logger.warning("Source directory '%s' does not exist.", source_dir)
         return
-    
-    if os.path.exists(target_dir):
-        print(f"Clearing destination directory: {target_dir}")
+
+    if clear and os.path.exists(target_dir):
+        logger.info("Clearing destination directory: %s", target_dir)
         clear_directory(target_dir)
 
     for root, dirs, files in os.walk(source_dir):
@@ -31,14 +51,142 @@ def copy_dir(source_dir, target_dir):
         for filename in files:
             src_path = os.path.join(root, filename)
             dst_path = os.path.join(dest_root, filename)
-            print(f"Copying {src_path} → {dst_path}")
+            logger.info("Copying %s → %s", src_path, dst_path)
             shutil.copy2(src_path, dst_path)
 
-    print("✅ Copy complete!")
+    logger.info("✅ Copy complete!")
+
+def file_signature(path, compare="mtime"):
+    if compare == "hash":
+        return hash_file(path)
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def output_matches_source(src_path, dst_path, compare="mtime"):
+    if not os.path.isfile(dst_path):
+        return False
+    if compare == "hash":
+        return hash_file(src_path) == hash_file(dst_path)
+    # copy2 and copystat carry the mtime over, so an untouched copy has the same stat
+    return file_signature(src_path) == file_signature(dst_path)
+
+def copy_file(src_path, dst_path, link=False):
+    # The copy is made under a temporary name and renamed over the old file,
+    # so the output path always holds either the old or the new contents
+    tmp_path = temp_path(dst_path)
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    place_copy(src_path, tmp_path, link)
+    os.replace(tmp_path, dst_path)
+
+def place_copy(src_path, dst_path, link=False):
+    if link:
+        try:
+            os.link(src_path, dst_path)
+            return
+        except OSError:
+            pass  # different filesystem or no hardlink support, fall back to a copy
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            # Lets the kernel copy in place, which is a reflink on filesystems that support it
+            with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(src_path, dst_path)
+                return
+        except OSError:
+            pass
+
+    shutil.copy2(src_path, dst_path)
+
+def sync_dir(source_dir, target_dir, previous=None, compare="mtime", link=False, image_cache_dir=None, jobs=1,
+             profiler=None):
+    previous = previous or {}
+    profiler = profiler or Profiler()
+    synced = {}
+    copied = unchanged = removed = 0
+    images = []
+
+    if not os.path.exists(source_dir):
+        logger.warning("Source directory '%s' does not exist.", source_dir)
+        source_files = []
+    else:
+        source_files = []
+        for root, dirs, files in os.walk(source_dir):
+            for filename in files:
+                source_files.append(os.path.relpath(os.path.join(root, filename), source_dir))
+
+    for relative_path in sorted(source_files):
+        src_path = os.path.join(source_dir, relative_path)
+        dst_path = os.path.join(target_dir, relative_path)
+        signature = file_signature(src_path, compare)
+        optimize = image_cache_dir is not None and relative_path.lower().endswith(".png")
+        if optimize:
+            # Tagged so turning optimization on or off recopies the images
+            signature = [signature, "optimized"]
+        synced[relative_path] = signature
+
+        if relative_path in previous:
+            if previous[relative_path] == signature and os.path.isfile(dst_path):
+                unchanged += 1
+                continue
+        elif not optimize and output_matches_source(src_path, dst_path, compare):
+            unchanged += 1
+            continue
+
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        if optimize:
+            images.append((src_path, dst_path))
+            continue
+        copy_file(src_path, dst_path, link)
+        profiler.add_bytes("static copy", os.path.getsize(dst_path))
+        copied += 1
+
+    if images:
+        results = optimize_images(images, image_cache_dir, jobs)
+        copied += len(results)
+        before = sum(result[0] for result in results)
+        after = sum(result[1] for result in results)
+        profiler.add_bytes("static copy", after)
+        cached = sum(1 for result in results if result[2])
+        print(f"Images: {len(results)} optimized ({cached} from cache), saved {(before - after) / 1024:.1f} KiB")
+
+    for relative_path in sorted(set(previous) - set(synced)):
+        dst_path = os.path.join(target_dir, relative_path)
+        if os.path.isfile(dst_path):
+            os.remove(dst_path)
+            removed += 1
+        remove_empty_parents(os.path.dirname(dst_path), target_dir)
+
+    print(f"Static: {copied} copied, {unchanged} unchanged, {removed} removed")
+    return synced
+
+# Directory under the output that holds the search index
+SEARCH_DIR = "search"
+
+# Sources at least this big are rendered block by block instead of in memory
+STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
 
 def extract_title(markdown):
-    lines = markdown.splitlines()
-    
+    return extract_title_from_lines(markdown.splitlines())
+
+def read_title(path):
+    # Stops reading at the end of the front matter, or as soon as the title line is found
+    with open(path, "r", encoding="utf-8") as f:
+        meta, header_lines = parse_front_matter(f)
+        if "title" in meta:
+            return meta["title"]
+        if not header_lines:
+            f.seek(0)
+        return extract_title_from_lines(f)
+
+def extract_title_from_lines(lines):
     for line in lines:
         match = re.match(r"^#{1}\s+(.+)", line.strip())
         if match:
@@ -46,37 +194,456 @@ def extract_title(markdown):
     
     raise ValueError("No title found")
 
+class PageBuildError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        lines = [f"{path}: {error}" for path, error in failures]
+        super().__init__(f"{len(failures)} page(s) failed to build:\n" + "\n".join(lines))
+
 def generate_page(from_path, template_path, dest_path, basepath=None):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    logger.info("Generating page from %s to %s using %s", from_path, dest_path, template_path)
+    write_page(from_path, Template.load(template_path, basepath), dest_path, basepath)
+
+def write_page(from_path, template, dest_path, basepath=None, profiler=None, cache=None, page=None):
+    profiler = profiler or Profiler()
+    source_size = os.path.getsize(from_path)
 
+    if source_size >= STREAM_THRESHOLD_BYTES:
+        # Reading, parsing and writing are interleaved here, so they are timed together
+        with profiler.phase("stream", source_size):
+            written = write_page_streaming(from_path, template, dest_path, basepath, page, cache)
+        if page is not None:
+            page["written"] = written
+        return
+
+    with profiler.phase("read", source_size):
+        from_contents = read_source(from_path)
+
+    template_contents = render_page(from_contents, template, basepath, profiler, cache, source_size, page)
+
+    start = time.perf_counter()
+    written = write_output(dest_path, template_contents)
+    profiler.add("write", time.perf_counter() - start, len(template_contents) if written else 0)
+    if page is not None:
+        page["written"] = written
+
+def read_source(from_path):
     with open(from_path, "r", encoding="utf-8") as f:
-        from_contents = f.read()
+        return f.read()
+
+def write_output(dest_path, contents):
+    # An identical render is not written again, so the output keeps its mtime
+    return publish_text(dest_path, contents)
+
+def render_page(from_contents, template, basepath=None, profiler=None, cache=None, source_size=0, page=None):
+    # page, when given, receives the title and links found while parsing, and
+    # the plain text too if it already has a "text" key
+    profiler = profiler or Profiler()
+    want_text = page is not None and "text" in page
+
+    entry = None
+    if cache is not None:
+        with profiler.phase("fragment cache"):
+            cache_key = cache.key(from_contents, basepath)
+            entry = cache.get(cache_key)
+        if entry and want_text and "text" not in entry:
+            entry = None  # cached by a build without search, parse again to get the text
+        profiler.count("fragment cache hits" if entry else "fragment cache misses")
 
-    with open(template_path, "r", encoding="utf-8") as f:
-        template_contents = f.read()
+    if entry:
+        content_title = entry["title"]
+        content_html = entry["html"]
+        links = entry["links"]
+        text = entry.get("text")
+    else:
+        links = []
+        plain_text = [] if want_text else None
+        with profiler.phase("parse", source_size):
+            meta, body = split_front_matter(from_contents)
+            # Code blocks are highlighted through the same cache, so a sample shared
+            # by many pages is only highlighted once
+            content_node = markdown_to_html_node(body, profiler, links, plain_text, highlighter(cache))
+            content_title = meta["title"] if "title" in meta else extract_title(body)
+        text = " ".join(plain_text) if want_text else None
 
-    content_node = markdown_to_html_node(from_contents)
-    content_title = extract_title(from_contents)
+        start = time.perf_counter()
+        # Root-relative href/src props get the basepath while they are serialized,
+        # so text inside code blocks is never rewritten
+        content_html = content_node.to_html(basepath)
+        profiler.add("render", time.perf_counter() - start, len(content_html))
 
-    template_contents = template_contents.replace("{{ Content }}", content_node.to_html())
-    template_contents = template_contents.replace("{{ Title }}", content_title)
+        if cache is not None:
+            with profiler.phase("fragment cache"):
+                entry = {"title": content_title, "html": content_html, "links": links}
+                if want_text:
+                    entry["text"] = text
+                cache.put(cache_key, entry)
 
-    if basepath:
-        template_contents = template_contents.replace('href="/', f'href="{basepath}')
-        template_contents = template_contents.replace('src="/', f'src="{basepath}')
+    if page is not None:
+        page.update(title=content_title, links=links)
+        if want_text:
+            page["text"] = text
 
-    with open(dest_path, "w", encoding="utf-8") as f:
-        f.write(template_contents)
+    start = time.perf_counter()
+    template_contents = template.render(Title=content_title, Content=content_html)
+    profiler.add("template fill", time.perf_counter() - start, len(template_contents))
+    return template_contents
 
-def generate_pages_recursive(content_dir, template_path, dest_dir, basepath=None):
+def write_page_streaming(from_path, template, dest_path, basepath=None, page=None, cache=None):
+    content_title = read_title(from_path)
+    links = []
+    plain_text = [] if page is not None and "text" in page else None
+
+    with open(from_path, "r", encoding="utf-8") as src:
+        meta, header_lines = parse_front_matter(src)
+        src.seek(0)
+        lines = blank_front_matter(src, header_lines)
+        content = iter_markdown_html(lines, basepath, links, plain_text, highlighter(cache))
+        written = publish_stream(dest_path, lambda f: template.write(f.write, Title=content_title, Content=content))
+
+    if page is not None:
+        page.update(title=content_title, links=links)
+        if plain_text is not None:
+            page["text"] = " ".join(plain_text)
+    return written
+
+def find_markdown_files(content_dir):
+    sources = []
     for root, dirs, files in os.walk(content_dir):
         for filename in files:
             if filename.endswith(".md"):
-                from_path = os.path.join(root, filename)
+                sources.append(os.path.relpath(os.path.join(root, filename), content_dir))
+    # Sorted so serial and parallel builds visit (and report) pages in the same order
+    return sorted(sources)
+
+def shard_of(relative_path, count):
+    # Hashing the path keeps the split stable across machines and independent of listing order
+    key = relative_path.replace(os.sep, "/").encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big") % count + 1
+
+def new_page_info(collect_text=False):
+    # A "text" key asks the renderer to collect the page's plain text as well
+    return {"text": None} if collect_text else {}
+
+def _write_page_task(template, basepath, cache, collect_text, task):
+    from_path, dest_path = task
+    # Each task gets its own profiler so workers can ship their numbers back
+    profiler = Profiler()
+    page = new_page_info(collect_text)
+    start = time.perf_counter()
+    try:
+        write_page(from_path, template, dest_path, basepath, profiler, cache, page)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", profiler.snapshot(), page
+    profiler.record_page(from_path, time.perf_counter() - start)
+    return None, profiler.snapshot(), page
+
+def render_pages(tasks, template, basepath=None, jobs=1, profiler=None, cache=None, pages=None, collect_text=False):
+    for from_path, dest_path in tasks:
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    # The template is parsed once by the caller and shipped to workers with each chunk
+    task_fn = partial(_write_page_task, template, basepath, cache, collect_text)
+    parallel = jobs > 1 and len(tasks) > 1
+    if not parallel:
+        results = map(task_fn, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        # Large chunks keep per-page IPC overhead low; a few chunks per worker balance the load
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        results = executor.map(task_fn, tasks, chunksize=chunksize)
+
+    failures = []
+    try:
+        for task, (error, snapshot, page) in zip(tasks, results):
+            logger.info("Generating page from %s to %s", task[0], task[1])
+            if profiler is not None:
+                profiler.merge(snapshot)
+            if pages is not None:
+                pages[task[0]] = page
+            if error is not None:
+                failures.append((task[0], error))
+    finally:
+        if parallel:
+            executor.shutdown()
+    return failures
+
+def render_pages_pipelined(tasks, template, basepath=None, profiler=None, cache=None, io_threads=4, queue_depth=16,
+                           pages=None, collect_text=False):
+    profiler = profiler or Profiler()
+    pages = {} if pages is None else pages
+    for from_path, dest_path in tasks:
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    # The I/O stages only time themselves; the profiler is updated on this thread
+    def read(task):
+        start = time.perf_counter()
+        source_size = os.path.getsize(task[0])
+        if source_size >= STREAM_THRESHOLD_BYTES:
+            return None, source_size, 0.0
+        return read_source(task[0]), source_size, time.perf_counter() - start
+
+    def process(task, source):
+        from_contents, source_size, read_seconds = source
+        page = pages[task[0]] = new_page_info(collect_text)
+        start = time.perf_counter()
+        if from_contents is None:
+            with profiler.phase("stream", source_size):
+                page["written"] = write_page_streaming(task[0], template, task[1], basepath, page, cache)
+            profiler.record_page(task[0], time.perf_counter() - start)
+            return None
+
+        profiler.add("read", read_seconds, source_size)
+        template_contents = render_page(from_contents, template, basepath, profiler, cache, source_size, page)
+        profiler.record_page(task[0], read_seconds + time.perf_counter() - start)
+        return template_contents
+
+    def write(task, template_contents):
+        if template_contents is None:
+            return None  # streamed pages are written while they render
+        start = time.perf_counter()
+        written = write_output(task[1], template_contents)
+        pages[task[0]]["written"] = written
+        return time.perf_counter() - start, len(template_contents) if written else 0
+
+    failures = []
+    for task, result, error in run_pipeline(tasks, read, process, write, io_threads, queue_depth):
+        logger.info("Generating page from %s to %s", task[0], task[1])
+        if error is not None:
+            failures.append((task[0], f"{type(error).__name__}: {error}"))
+        elif result is not None:
+            profiler.add("write", result[0], result[1])
+    return failures
+
+def page_options(basepath=None):
+    # Option inputs shared by every page; a page built under other values is stale
+    return {
+        option_node("basepath"): hash_options({"basepath": basepath}),
+        option_node("renderer"): hash_options({"parser": PARSER_VERSION, "highlighter": HIGHLIGHTER_VERSION}),
+    }
+
+def generate_pages_recursive(content_dir, template_path, dest_dir, *, basepath=None, manifest=None, jobs=1, profiler=None,
+                             cache=None, io_threads=0, queue_depth=16, shard=None, search_index=None, drafts=False):
+    profiler = profiler or Profiler()
+    discovery_start = time.perf_counter()
+
+    sources = find_markdown_files(content_dir)
+    if shard is not None:
+        index, count = shard
+        sources = [relative_path for relative_path in sources if shard_of(relative_path, count) == index]
+
+    # Only the front matter is read here; the body is left for the render
+    metadata = {}
+    for relative_path in sources:
+        try:
+            metadata[relative_path] = read_front_matter(os.path.join(content_dir, relative_path))[0]
+        except FrontMatterError:
+            metadata[relative_path] = {}  # reported with the page when it is rendered
+    skipped_drafts = []
+    if not drafts:
+        skipped_drafts = [relative_path for relative_path in sources if metadata[relative_path].get("draft")]
+        sources = [relative_path for relative_path in sources if not metadata[relative_path].get("draft")]
+    if shard is not None and manifest is not None and "shard" in manifest.data:
+        # Lets the merge tell drafts left out on purpose from pages no shard built
+        manifest.data["shard"]["drafts"] = skipped_drafts
+    pages = []
+    for relative_path in sources:
+        dest_path = os.path.splitext(os.path.join(dest_dir, relative_path))[0] + ".html"
+        pages.append((os.path.join(content_dir, relative_path), dest_path))
+
+    if manifest is not None:
+        # Every page is built from its source, the template, the basepath and the
+        # renderer, so a new parser or highlighter rebuilds pages (and re-derives
+        # their links) even when their sources did not change
+        shared_inputs = {os.path.normpath(template_path): hash_file(template_path), **page_options(basepath)}
+        hashes = dict(shared_inputs)
+        for from_path, dest_path in pages:
+            hashes[os.path.normpath(from_path)] = hash_file(from_path)
+        stale = set(manifest.graph.affected(manifest.changed_inputs(hashes)))
+
+    tasks = []
+    skipped = 0
+    for from_path, dest_path in pages:
+        output_node = os.path.normpath(dest_path)
+        # A page recorded with other inputs, e.g. before the renderer was one, is rebuilt
+        current = (
+            manifest is not None
+            and manifest.graph.inputs_of(output_node) == sorted([os.path.normpath(from_path), *shared_inputs])
+            and output_node not in stale
+            and os.path.exists(dest_path)
+        )
+        if current:
+            # A page missing from the search index is rendered again to get its text
+            if search_index is None or search_index.has_page(os.path.relpath(from_path, content_dir)):
+                skipped += 1
+                continue
+        tasks.append((from_path, dest_path))
+
+    template = Template.load(template_path, basepath)
+    profiler.add("discovery", time.perf_counter() - discovery_start, calls=len(sources))
+    rendered = {}
+    collect_text = search_index is not None
+    if io_threads > 0:
+        failures = render_pages_pipelined(tasks, template, basepath, profiler, cache, io_threads, queue_depth, rendered,
+                                          collect_text)
+    else:
+        failures = render_pages(tasks, template, basepath, jobs, profiler, cache, rendered, collect_text)
+    failed = {path for path, error in failures}
+
+    if search_index is not None:
+        with profiler.phase("search index"):
+            for from_path, dest_path in tasks:
                 relative_path = os.path.relpath(from_path, content_dir)
-                dest_path = os.path.join(dest_dir, relative_path)
-                dest_path = os.path.splitext(dest_path)[0] + ".html"
-                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                generate_page(from_path, template_path, dest_path, basepath)
+                if from_path in failed:
+                    search_index.remove_page(relative_path)
+                    continue
+                page = rendered[from_path]
+                url = page_url(os.path.relpath(dest_path, dest_dir), basepath)
+                search_index.update_page(relative_path, url, page["title"], page["text"])
+            for relative_path in search_index.indexed_pages() - set(sources):
+                search_index.remove_page(relative_path)
+            print(f"Search: {search_index.write()} index shard(s) written")
+
+    if manifest is not None:
+        for from_path, dest_path in tasks:
+            relative_path = os.path.relpath(from_path, content_dir)
+            if from_path in failed:
+                # Forget the page so the next build retries it even if none of its inputs change
+                manifest.pages.pop(relative_path, None)
+                manifest.graph.remove_output(os.path.normpath(dest_path))
+                continue
+            manifest.graph.set_inputs(os.path.normpath(dest_path), [os.path.normpath(from_path), *shared_inputs])
+            page = rendered[from_path]
+            meta = dict(metadata[relative_path], title=page["title"])
+            manifest.record_page(relative_path, os.path.relpath(dest_path, dest_dir), page["links"], meta)
+
+        removed = remove_stale_pages(manifest, set(sources), dest_dir)
+        manifest.record_inputs(hashes)
+        generated = len(tasks) - len(failed)
+        identical = sum(1 for from_path, dest_path in tasks if from_path not in failed and not rendered[from_path]["written"])
+        summary = f"Pages: {generated} generated, {skipped} unchanged, {removed} removed"
+        if identical:
+            summary += f" ({identical} rendered identical, not rewritten)"
+        print(summary)
+
+    if failures:
+        raise PageBuildError(failures)
+
+    print("All pages generated successfully!")
+
+def check_links(manifest, content_dir, strict=False, extra_outputs=()):
+    # Uses the links recorded while pages were parsed, so no output is read back
+    pages = {
+        os.path.join(content_dir, source_rel): (entry["output"], entry["links"])
+        for source_rel, entry in manifest.pages.items()
+    }
+    outputs = output_index([entry["output"] for entry in manifest.pages.values()] + list(manifest.static) + list(extra_outputs))
+    broken = find_broken_links(pages, outputs)
+    print(f"Links: {sum(len(links) for output, links in pages.values())} checked, {len(broken)} broken")
+    if broken and strict:
+        raise BrokenLinksError(broken)
+    for link in broken:
+        print(format_broken(*link))
+    return broken
+
+def remove_stale_pages(manifest, seen, dest_dir):
+    removed = 0
+    for source_rel in sorted(set(manifest.pages) - seen):
+        entry = manifest.pages.pop(source_rel)
+        output_path = os.path.join(dest_dir, entry["output"])
+        manifest.graph.remove_output(os.path.normpath(output_path))
+        if os.path.isfile(output_path):
+            os.remove(output_path)
+            removed += 1
+        remove_empty_parents(os.path.dirname(output_path), dest_dir)
+    return removed
+
+def remove_empty_parents(directory, stop_dir):
+    stop_dir = os.path.normpath(stop_dir)
+    directory = os.path.normpath(directory)
+    while directory != stop_dir and directory.startswith(stop_dir + os.sep):
+        if os.listdir(directory):
+            break
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+def build_site(content_dir, static_dir, public_dir, template_path, *, basepath="/", manifest=None, clean=False, jobs=1,
+               static_compare="mtime", link_static=False, profiler=None, fragment_cache=None, io_threads=0, queue_depth=16,
+               image_cache_dir=None, gzip_min_size=None, shard=None, strict_links=False, search=False, drafts=False,
+               blog_dir=None, site_url=None):
+    profiler = profiler or Profiler()
+    os.makedirs(public_dir, exist_ok=True)
+
+    if clean or manifest is None:
+        with profiler.phase("clean"):
+            clear_directory(public_dir)
+        if manifest is not None:
+            manifest.clear_outputs()
+
+    if manifest is not None:
+        if shard is None:
+            manifest.data.pop("shard", None)
+        else:
+            # The output directory is kept so a merge can map graph nodes to the merged tree
+            manifest.data["shard"] = {"index": shard[0], "count": shard[1], "output": os.path.normpath(public_dir)}
+
+    # Without a manifest there is nothing that remembers which files are ours,
+    # so the static copy keeps the old wipe-and-copy behaviour
+    with profiler.phase("static copy"):
+        if manifest is None:
+            copy_dir(static_dir, public_dir)
+        elif shard is None or shard[0] == 1:
+            # Only the first shard copies static files, so merged shards never disagree on them
+            synced = sync_dir(static_dir, public_dir, manifest.static, static_compare, link_static, image_cache_dir, jobs,
+                              profiler)
+            manifest.static.clear()
+            manifest.static.update(synced)
+    search_dir = os.path.join(public_dir, SEARCH_DIR)
+    search_index = None
+    if search and manifest is not None:
+        search_index = SearchIndex(search_dir, manifest.search)
+    elif manifest is not None and manifest.search:
+        # Search was turned off, so its files would go stale
+        shutil.rmtree(search_dir, ignore_errors=True)
+        manifest.search.clear()
 
-    print("All pages generated successfully!")
\ No newline at end of file
+    previous_inputs = dict(manifest.inputs) if manifest is not None else {}
+    listings = []
+    try:
+        generate_pages_recursive(content_dir, template_path, public_dir, basepath=basepath, manifest=manifest, jobs=jobs,
+                                 profiler=profiler, cache=fragment_cache, io_threads=io_threads, queue_depth=queue_depth,
+                                 shard=shard, search_index=search_index, drafts=drafts)
+        # A shard only knows its own pages; listings and links are done after the merge instead
+        if manifest is not None and shard is None:
+            with profiler.phase("listings"):
+                listings = generate_listings(manifest, public_dir, template_path, basepath, site_url, previous_inputs, blog_dir)
+            with profiler.phase("link check"):
+                check_links(manifest, content_dir, strict_links, listings)
+        if gzip_min_size is not None:
+            with profiler.phase("compress"):
+                compressed = precompress(public_dir, manifest.compressed if manifest else None, gzip_min_size, jobs,
+                                         profiler)
+            if manifest is not None:
+                manifest.compressed.clear()
+                manifest.compressed.update(compressed)
+        elif manifest is not None and manifest.compressed:
+            # Compression was turned off, so the sidecars would go stale
+            remove_sidecars(public_dir, manifest.compressed)
+            manifest.compressed.clear()
+        if manifest is not None:
+            # Drops outputs left in the graph by an earlier output directory
+            outputs = [entry["output"] for entry in manifest.pages.values()] + [os.path.join(*rel.split("/")) for rel in listings]
+            manifest.graph.retain(os.path.normpath(os.path.join(public_dir, output)) for output in outputs)
+    finally:
+        if fragment_cache is not None:
+            with profiler.phase("fragment cache"):
+                profiler.count("fragment cache evictions", fragment_cache.prune())
+            counters = profiler.counters
+            print(
+                f"Fragment cache: {counters.get('fragment cache hits', 0)} hits, "
+                f"{counters.get('fragment cache misses', 0)} misses, "
+                f"{counters.get('fragment cache evictions', 0)} evicted"
+            )
+        # Pages that did build are recorded even when others failed
+        if manifest is not None:
+            manifest.save()
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+from depgraph import DependencyGraph
+from publish import publish_text
+
+MANIFEST_VERSION = 3
+HASH_CHUNK_SIZE = 1 << 20
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_options(options):
+    return hash_bytes(json.dumps(options, sort_keys=True).encode("utf-8"))
+
+class Manifest():
+    def __init__(self, path, data = None):
+        self.path = path
+        self.data = data or {}
+        self.data["version"] = MANIFEST_VERSION
+        self.data.setdefault("pages", {})
+        self.data.setdefault("static", {})
+        self.data.setdefault("compressed", {})
+        self.data.setdefault("inputs", {})
+        self.data.setdefault("search", {})
+        self.graph = DependencyGraph(self.data.get("graph"))
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+
+        # A manifest written by another layout is treated as a cold build
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data)
+
+    @property
+    def pages(self):
+        return self.data["pages"]
+
+    @property
+    def static(self):
+        return self.data["static"]
+
+    @property
+    def inputs(self):
+        return self.data["inputs"]
+
+    @property
+    def search(self):
+        return self.data["search"]
+
+    @property
+    def compressed(self):
+        return self.data["compressed"]
+
+    def clear_outputs(self):
+        self.pages.clear()
+        self.static.clear()
+        self.compressed.clear()
+        self.inputs.clear()
+        self.search.clear()
+        self.graph = DependencyGraph()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.data["graph"] = self.graph.to_data()
+        publish_text(self.path, json.dumps(self.data, indent=1, sort_keys=True))
+
+    def changed_inputs(self, hashes):
+        return {node for node, digest in hashes.items() if self.inputs.get(node) != digest}
+
+    def record_inputs(self, hashes):
+        self.inputs.update(hashes)
+        # Only inputs something still depends on are worth remembering
+        for node in [node for node in self.inputs if node not in self.graph.dependents]:
+            del self.inputs[node]
+
+    def record_page(self, source_rel, output_rel, links=(), meta=None):
+        # Links and metadata are kept so pages skipped by an incremental build can
+        # still be checked and listed
+        self.pages[source_rel] = {"output": output_rel, "links": [list(link) for link in links], "meta": meta or {}}
@@ -5,9 +5,23 @@ from parentnode import ParentNode
 from textnode import TextType
 from textnode import TextNode
 from blocktype import BlockType
+from highlight import highlight_memo
+
+# Bump whenever the HTML produced for the same markdown changes, so cached
+# fragments from older versions are not reused
+PARSER_VERSION = 5
+
+class MarkdownSyntaxError(ValueError):
+    # text and offset locate the problem in the tokenized text; line is the
+    # 1-based source line, filled in once the failing block is known
+    def __init__(self, message, line=None, text=None, offset=0):
+        self.message = message
+        self.line = line
+        self.text = text
+        self.offset = offset
+        super().__init__(message if line is None else f"line {line}: {message}")
 
 def text_node_to_html_node(text_node):
-    newLeaf = LeafNode(None, text_node.text, {})
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -47,7 +61,7 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
                 
                 del_end = text.find(delimiter, del_start + len(delimiter))
                 if del_end == -1:
-                    raise ValueError(f"invalid markdown syntax: closing delimiter for |{delimiter}| not found")
+                    raise MarkdownSyntaxError(f"invalid markdown syntax: closing delimiter for |{delimiter}| not found")
 
                 del_text = text[del_start + len(delimiter):del_end]
                 new_nodes.append(TextNode(del_text, text_type))
@@ -55,157 +69,364 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
         
     return new_nodes
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return LINK_PATTERN.findall(text)
 
-def split_nodes_image(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
     new_nodes = []
 
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-        
+
         text = node.text
         text_start = 0
 
-        for match in extract_markdown_images(text):
-            match_text = f"![{match[0]}]({match[1]})"
-            split_start = text.find(match_text, text_start)
-            split_end = split_start + len(match_text)
-
-            if split_start == -1:
-                if text_start < len(text):
-                    new_nodes.append(TextNode(text[text_start:], TextType.TEXT))
-                break
-
-            if split_start > text_start:
-                new_nodes.append(TextNode(text[text_start:split_start], TextType.TEXT))
-            
-            new_nodes.append(TextNode(match[0], TextType.IMAGE, match[1]))
-            text_start = split_end
+        # Each match carries its own position, so the text is never searched again
+        for match in pattern.finditer(text):
+            if match.start() > text_start:
+                new_nodes.append(TextNode(text[text_start:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            text_start = match.end()
 
         if text_start < len(text):
             new_nodes.append(TextNode(text[text_start:], TextType.TEXT))
 
     return new_nodes
 
+def split_nodes_image(old_nodes):
+    return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
+
 def split_nodes_link(old_nodes):
-    new_nodes = []
+    return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
 
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
-        
-        text = node.text
-        text_start = 0
+INLINE_MARKER_PATTERN = re.compile(r"\*\*|[_`\[]|!\[")
+INLINE_LINK_PATTERN = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+INLINE_DELIMITERS = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
 
-        for match in extract_markdown_links(text):
-            match_text = f"[{match[0]}]({match[1]})"
-            split_start = text.find(match_text, text_start)
-            split_end = split_start + len(match_text)
+def text_to_textnodes(text):
+    nodes = []
+    text_start = 0
+    pos = 0
 
-            if split_start == -1:
-                if text_start < len(text):
-                    new_nodes.append(TextNode(text[text_start:], TextType.TEXT))
-                break
+    # One left-to-right scan: jump to the next marker, consume the token it
+    # opens and carry on after it, so every character is looked at once
+    while True:
+        marker = INLINE_MARKER_PATTERN.search(text, pos)
+        if marker is None:
+            break
 
-            if split_start > text_start:
-                new_nodes.append(TextNode(text[text_start:split_start], TextType.TEXT))
-            
-            new_nodes.append(TextNode(match[0], TextType.LINK, match[1]))
-            text_start = split_end
+        token_start = marker.start()
+        token = marker.group()
 
-        if text_start < len(text):
-            new_nodes.append(TextNode(text[text_start:], TextType.TEXT))
+        if token in INLINE_DELIMITERS:
+            inner_start = token_start + len(token)
+            del_end = text.find(token, inner_start)
+            if del_end == -1:
+                # Nothing after this point can close it, so the page fails here
+                # instead of scanning on
+                raise MarkdownSyntaxError(f"invalid markdown syntax: closing delimiter for |{token}| not found",
+                                          text=text, offset=token_start)
+            node = TextNode(text[inner_start:del_end], INLINE_DELIMITERS[token])
+            token_end = del_end + len(token)
+        else:
+            is_image = token == "!["
+            match = INLINE_LINK_PATTERN.match(text, token_start + 1 if is_image else token_start)
+            if match is None:
+                pos = token_start + len(token)
+                continue
+            if is_image:
+                node = TextNode(match.group(1), TextType.IMAGE, match.group(2))
+            else:
+                node = TextNode(match.group(1), TextType.LINK, match.group(2))
+            token_end = match.end()
 
-    return new_nodes
+        if token_start > text_start:
+            nodes.append(TextNode(text[text_start:token_start], TextType.TEXT))
+        nodes.append(node)
+        text_start = pos = token_end
 
-def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    if text_start < len(text):
+        nodes.append(TextNode(text[text_start:], TextType.TEXT))
     return nodes
 
 def markdown_to_blocks(text):
-    return [p.strip() for p in text.split("\n\n") if p.strip() != ""]
+    return list(iter_blocks(text.split("\n")))
 
-def is_ordered_list_block(text):
-    lines = [line for line in text.split('\n') if line.strip()]
-    pattern = re.compile(r'^(\d+)\.\s')
+def iter_blocks(lines):
+    for line_number, block in iter_numbered_blocks(lines):
+        yield block
+
+def iter_numbered_blocks(lines):
+    # Blocks end at empty lines, so they can be yielded as soon as one is
+    # complete without holding the rest of the document. Each block comes with
+    # the 1-based source line it starts on.
+    block_lines = []
+    first_line = 1
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip("\n")
+        if line:
+            if not block_lines:
+                first_line = line_number
+            block_lines.append(line)
+            continue
+        if block_lines:
+            yield from _numbered_block(first_line, block_lines)
+            block_lines = []
+
+    if block_lines:
+        yield from _numbered_block(first_line, block_lines)
 
+def _numbered_block(first_line, block_lines):
+    joined = "\n".join(block_lines)
+    block = joined.lstrip()
+    if block:
+        # Whitespace-only lines stripped off the front shift where the block starts
+        yield first_line + joined.count("\n", 0, len(joined) - len(block)), block.rstrip()
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s\S")
+CODE_LANGUAGE_PATTERN = re.compile(r"[\w+#.-]+")
+ORDERED_ITEM_PATTERN = re.compile(r"^(\d+)\.\s")
+
+def is_ordered_list_block(text):
     expected = 1
-    for line in lines:
-        match = pattern.match(line)
+    for line in text.split("\n"):
+        if not line.strip():
+            continue
+        match = ORDERED_ITEM_PATTERN.match(line)
         if not match or int(match.group(1)) != expected:
             return False
         expected += 1
     return True
 
-def block_to_block_type(text):
+def paragraph_line(line):
+    return line.strip()
+
+def quote_line(line):
+    return line.lstrip("> ").rstrip()
+
+def classify_block(text):
+    # Returns the block type plus what rendering needs from it: (language, code)
+    # for code, (level, text) for headings, the item list for lists, or the joined text
     if not text.strip():
-        return BlockType.PARAGRAPH
-    
-    lines = text.split("\n")
-    match_heading = r"^[#]{1,6}\s\S"
+        return BlockType.PARAGRAPH, " ".join(paragraph_line(line) for line in text.split("\n"))
 
     if text.startswith("```") and text.endswith("```"):
-        return BlockType.CODE
-    elif re.match(match_heading, text):
-        return BlockType.HEADING
-    elif all(line.startswith('>') for line in lines if line.strip()):
-        return BlockType.QUOTE
-    elif all(line.startswith('- ') for line in lines if line.strip()):
-        return BlockType.UL
-    elif is_ordered_list_block(text):
-        return BlockType.OL
+        code = text[3:-3]
+        info, newline, rest = code.partition("\n")
+        if newline and CODE_LANGUAGE_PATTERN.fullmatch(info.strip()):
+            return BlockType.CODE, (info.strip(), rest)
+        return BlockType.CODE, (None, code.lstrip("\n"))
+
+    heading = HEADING_PATTERN.match(text)
+    if heading:
+        return BlockType.HEADING, (len(heading.group(1)), text[text.find(" ") + 1:])
+
+    is_quote = is_ul = is_ol = True
+    quote_parts = []
+    ul_items = []
+    ol_items = []
+    paragraph_parts = []
+    expected = 1
+
+    # Single walk over the lines: every candidate type is checked and its
+    # payload collected at the same time, and dropped once it cannot match
+    for line in text.split("\n"):
+        blank = not line.strip()
+
+        if is_quote:
+            if blank or line.startswith(">"):
+                quote_parts.append(quote_line(line))
+            else:
+                is_quote = False
+
+        if is_ul:
+            if line.startswith("- "):
+                ul_items.append(line[2:])
+            elif blank:
+                ul_items.append(line)
+            else:
+                is_ul = False
+
+        if is_ol:
+            match = ORDERED_ITEM_PATTERN.match(line)
+            if match and int(match.group(1)) == expected:
+                ol_items.append(line[line.find(" ") + 1:])
+                expected += 1
+            elif blank:
+                ol_items.append(line)
+            else:
+                is_ol = False
+
+        paragraph_parts.append(paragraph_line(line))
+
+    if is_quote:
+        return BlockType.QUOTE, " ".join(quote_parts)
+    if is_ul:
+        return BlockType.UL, ul_items
+    if is_ol:
+        return BlockType.OL, ol_items
+    return BlockType.PARAGRAPH, " ".join(paragraph_parts)
+
+def block_to_block_type(text):
+    return classify_block(text)[0]
+
+def text_to_children(text, tokenize=text_to_textnodes):
+    return [text_node_to_html_node(n) for n in tokenize(text)]
+
+def classified_block_to_html_node(blocktype, payload, tokenize=text_to_textnodes, highlight=highlight_memo):
+    match blocktype:
+        case BlockType.CODE:
+            language, code = payload
+            if language is None:
+                return ParentNode("pre", [LeafNode("code", code)])
+            # Highlighted code comes back escaped; other languages are left as they are
+            highlighted = highlight(language, code)
+            return ParentNode("pre", [LeafNode("code", code if highlighted is None else highlighted,
+                                               {"class": f"language-{language}"})])
+        case BlockType.QUOTE:
+            return ParentNode("blockquote", text_to_children(payload, tokenize))
+        case BlockType.HEADING:
+            level, heading_text = payload
+            return ParentNode(f"h{level}", text_to_children(heading_text, tokenize))
+        case BlockType.UL:
+            return ParentNode("ul", [ParentNode("li", text_to_children(item, tokenize)) for item in payload])
+        case BlockType.OL:
+            return ParentNode("ol", [ParentNode("li", text_to_children(item, tokenize)) for item in payload])
+        case _:
+            return ParentNode("p", text_to_children(payload, tokenize))
+
+def source_length(node):
+    # How many characters of the tokenized text the node was made from
+    match node.text_type:
+        case TextType.BOLD:
+            return len(node.text) + 4
+        case TextType.ITALIC | TextType.CODE:
+            return len(node.text) + 2
+        case TextType.LINK:
+            return len(node.text) + len(node.url) + 4
+        case TextType.IMAGE:
+            return len(node.text) + len(node.url) + 5
+        case _:
+            return len(node.text)
+
+class InlineCollector():
+    # Wraps the inline tokenizer and records what later build stages need from
+    # the page while it is parsed: (line, url) for every link and image, and
+    # the plain text of every inline run
+    def __init__(self, tokenize, links=None, plain_text=None):
+        self.tokenize = tokenize
+        self.links = links
+        self.plain_text = plain_text
+        self.pending = []
+        self.calls = 0
+
+    def __call__(self, text):
+        nodes = self.tokenize(text)
+        if self.links is not None:
+            # The nodes cover the text end to end, so their lengths give each
+            # link's offset in the text it was tokenized from
+            offset = 0
+            for node in nodes:
+                if node.url is not None:
+                    self.pending.append((self.calls, offset, node.url))
+                offset += source_length(node)
+        if self.plain_text is not None:
+            self.plain_text.extend(node.text for node in nodes if node.text_type != TextType.IMAGE)
+        self.calls += 1
+        return nodes
+
+    def finish_block(self, first_line, block, blocktype):
+        # Maps (text, offset) back to a source line the way classify_block built
+        # the texts from the block's lines
+        if self.links is not None:
+            if blocktype in (BlockType.UL, BlockType.OL):
+                # One text per line, blank lines included
+                self.links.extend((first_line + call, url) for call, offset, url in self.pending)
+            elif blocktype == BlockType.HEADING:
+                # The block after the marker, newlines and all; offsets only grow,
+                # so newlines are counted from the previous link onwards
+                start = pos = block.find(" ") + 1
+                line = first_line
+                for call, offset, url in self.pending:
+                    line += block.count("\n", pos, start + offset)
+                    pos = max(pos, start + offset)
+                    self.links.append((line, url))
+            else:
+                # The block's lines trimmed and joined with single spaces; offsets
+                # only grow, so the lines are walked once
+                trim = quote_line if blocktype == BlockType.QUOTE else paragraph_line
+                lines = block.split("\n")
+                index = 0
+                line_end = len(trim(lines[0]))
+                for call, offset, url in self.pending:
+                    while offset > line_end and index + 1 < len(lines):
+                        index += 1
+                        line_end += 1 + len(trim(lines[index]))
+                    self.links.append((first_line + index, url))
+        self.pending.clear()
+        self.calls = 0
+
+def syntax_error_line(error, first_line, block):
+    # The unclosed delimiter is the last of its kind in the text being tokenized.
+    # List items and headings appear in the block as they are; paragraph and
+    # quote text is the whole block joined, so it is the last one in the block.
+    text = error.text
+    if text is None:
+        return first_line
+    pos = block.find(text)
+    if pos == -1:
+        token = text[error.offset:error.offset + 2]
+        token = token if token == "**" else token[:1]
+        pos = max(block.rfind(token), 0)
     else:
-        return BlockType.PARAGRAPH
+        pos += error.offset
+    return first_line + block.count("\n", 0, pos)
+
+def block_to_html_node_at(first_line, block, tokenize, highlight=highlight_memo, collector=None):
+    blocktype, payload = classify_block(block)
+    try:
+        node = classified_block_to_html_node(blocktype, payload, tokenize, highlight)
+    except MarkdownSyntaxError as e:
+        if e.line is not None:
+            raise
+        raise MarkdownSyntaxError(e.message, syntax_error_line(e, first_line, block)) from None
+    if collector is not None:
+        collector.finish_block(first_line, block, blocktype)
+    return node
 
-def markdown_to_html_node(text):
+def markdown_to_html_node(text, profiler=None, links=None, plain_text=None, highlight=highlight_memo):
     rootnode = ParentNode("div", None)
-    blocks = markdown_to_blocks(text)
-
-    for block in blocks:
-        blocktype = block_to_block_type(block)
-        child_nodes = tag = ""
-
-        match blocktype:
-            case BlockType.CODE:
-                tag = "pre"
-                child_nodes = [LeafNode("code", block[3:-3].lstrip("\n"))]
-            case BlockType.QUOTE:
-                tag = "blockquote"
-                block = " ".join(line.lstrip("> ").rstrip() for line in block.split("\n"))
-                child_nodes = [text_node_to_html_node(n) for n in text_to_textnodes(block)]
-            case BlockType.HEADING:
-                tag = "h" + str(len(re.match(r"^#+", block).group()))
-                child_nodes = [text_node_to_html_node(n) for n in text_to_textnodes(block[block.find(" ") + 1:])]
-            case BlockType.UL:
-                tag = "ul"
-                lines = (line[2:] if line.startswith("- ") else line for line in block.split("\n"))
-                child_nodes = [
-                    ParentNode("li", [text_node_to_html_node(n) for n in text_to_textnodes(item)])
-                    for item in lines
-                ]
-            case BlockType.OL:
-                tag = "ol"
-                lines = (line[line.find(" ") + 1:] if re.match(r'^(\d+)\.\s', line) else line for line in block.split("\n"))
-                child_nodes = [
-                    ParentNode("li", [text_node_to_html_node(n) for n in text_to_textnodes(item)])
-                    for item in lines
-                ]
-            case BlockType.PARAGRAPH:
-                tag = "p"
-                block = " ".join(line.strip() for line in block.split("\n"))
-                child_nodes = [text_node_to_html_node(n) for n in text_to_textnodes(block)]
-        rootnode.children.append(ParentNode(tag, child_nodes))
-    
-    return rootnode
\ No newline at end of file
+    # With a profiler the inline tokenizer is timed on its own
+    tokenize = profiler.timed(text_to_textnodes, "inline tokenize") if profiler else text_to_textnodes
+    collect = links is not None or plain_text is not None
+    if collect:
+        tokenize = InlineCollector(tokenize, links, plain_text)
+
+    collector = tokenize if collect else None
+    for first_line, block in iter_numbered_blocks(text.split("\n")):
+        rootnode.children.append(block_to_html_node_at(first_line, block, tokenize, highlight, collector))
+
+    return rootnode
+
+def iter_markdown_html(lines, basepath=None, links=None, plain_text=None, highlight=highlight_memo):
+    # Streaming counterpart of markdown_to_html_node(...).to_html(): HTML is
+    # produced block by block while the source is still being read
+    collect = links is not None or plain_text is not None
+    tokenize = InlineCollector(text_to_textnodes, links, plain_text) if collect else text_to_textnodes
+    collector = tokenize if collect else None
+    yield "<div>"
+    empty = True
+    for first_line, block in iter_numbered_blocks(lines):
+        empty = False
+        yield block_to_html_node_at(first_line, block, tokenize, highlight, collector).to_html(basepath)
+    if empty:
+        raise ValueError("ParentNode must have children.")
+    yield "</div>"
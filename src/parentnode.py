@@ -1,8 +1,10 @@
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, EMPTY_PROPS
 
 class ParentNode(HTMLNode):
+	__slots__ = ()
+
 	def __init__(self, tag, children, props = None):
-		super().__init__(tag, None, children or [], props or {})
+		super().__init__(tag, None, children or [], props or EMPTY_PROPS)
 
 	def __eq__(self, other):
 		if not isinstance(other, ParentNode):
@@ -18,23 +20,28 @@ class ParentNode(HTMLNode):
 			f"ParentNode(\n"
 			f"  tag={self.tag!r},\n"
 			f"  children={self.children!r},\n"
-			f"  props={self.props!r}\n"
+			f"  props={dict(self.props)!r}\n"
 			f")"
 		)
 
 
-	def to_html(self):
+	def to_html(self, basepath = None):
+		parts = []
+		self.write_html(parts.append, basepath)
+		return "".join(parts)
+
+	def write_html(self, write, basepath = None):
+		# Fragments go straight to the writer (a list's append, a file's write...)
+		# so no intermediate strings are built for subtrees
 		if self.tag is None:
 			raise ValueError("ParentNode must have a tag.")
 
 		if not self.children:
 			raise ValueError("ParentNode must have children.")
 
-		prop_str = self.props_to_html()
-		html_str = f"<{self.tag}{prop_str}>"
+		write(f"<{self.tag}{self.props_to_html(basepath)}>")
 
 		for child in self.children:
-			html_str += child.to_html()
+			child.write_html(write, basepath)
 
-		html_str += f"</{self.tag}>"
-		return html_str
+		write(f"</{self.tag}>")
@@ -0,0 +1,48 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+def run_pipeline(items, read, process, write, io_threads=4, queue_depth=16):
+    # read and write run on I/O threads while process runs on the calling
+    # thread, so item N+1 is being read and item N-1 written while item N is
+    # processed. At most queue_depth items sit on each side of the CPU stage,
+    # which bounds memory. Results are yielded in input order as
+    # (item, write_result, error).
+    items = iter(items)
+    pending_reads = deque()
+    pending_writes = deque()
+
+    with ThreadPoolExecutor(io_threads) as readers, ThreadPoolExecutor(io_threads) as writers:
+        def fill_reads():
+            while len(pending_reads) < queue_depth:
+                item = next(items, _DONE)
+                if item is _DONE:
+                    return
+                pending_reads.append((item, readers.submit(read, item)))
+
+        fill_reads()
+        while pending_reads:
+            item, read_future = pending_reads.popleft()
+            fill_reads()
+
+            try:
+                output = process(item, read_future.result())
+            except Exception as e:
+                pending_writes.append((item, None, e))
+            else:
+                pending_writes.append((item, writers.submit(write, item, output), None))
+
+            while len(pending_writes) > queue_depth:
+                yield _finish_write(*pending_writes.popleft())
+
+        while pending_writes:
+            yield _finish_write(*pending_writes.popleft())
+
+_DONE = object()
+
+def _finish_write(item, write_future, error):
+    if error is not None:
+        return item, None, error
+    try:
+        return item, write_future.result(), None
+    except Exception as e:
+        return item, None, e
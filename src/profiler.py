@@ -0,0 +1,107 @@
+import cProfile
+import heapq
+import io
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Order phases are listed in the report; anything else recorded goes after them
+PHASES = ("clean", "static copy", "discovery", "read", "parse", "inline tokenize", "render", "template fill", "write")
+
+class Profiler():
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.pages = []
+
+    @contextmanager
+    def phase(self, name, nbytes=0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, nbytes)
+
+    def add(self, name, seconds, nbytes=0, calls=1):
+        stats = self.phases.get(name)
+        if stats is None:
+            self.phases[name] = [seconds, calls, nbytes]
+        else:
+            stats[0] += seconds
+            stats[1] += calls
+            stats[2] += nbytes
+
+    def add_bytes(self, name, nbytes):
+        self.add(name, 0.0, nbytes, 0)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_page(self, path, seconds):
+        self.pages.append((seconds, path))
+
+    def timed(self, fn, name):
+        def wrapper(text):
+            start = time.perf_counter()
+            result = fn(text)
+            self.add(name, time.perf_counter() - start, len(text))
+            return result
+        return wrapper
+
+    def snapshot(self):
+        # Plain data so worker processes can send their numbers back
+        return {"phases": self.phases, "counters": self.counters, "pages": self.pages}
+
+    def merge(self, snapshot):
+        for name, (seconds, calls, nbytes) in snapshot["phases"].items():
+            self.add(name, seconds, nbytes, calls)
+        for name, amount in snapshot["counters"].items():
+            self.count(name, amount)
+        self.pages.extend(snapshot["pages"])
+
+    def report(self, top=10):
+        names = [name for name in PHASES if name in self.phases]
+        names += sorted(name for name in self.phases if name not in PHASES)
+
+        lines = [f"{'phase':<16} {'seconds':>9} {'calls':>8} {'bytes':>12}"]
+        for name in names:
+            seconds, calls, nbytes = self.phases[name]
+            lines.append(f"{name:<16} {seconds:>9.4f} {calls:>8} {nbytes:>12}")
+        if "inline tokenize" in self.phases:
+            lines.append("(parse time includes inline tokenize)")
+
+        if self.counters:
+            lines.append("")
+            for name in sorted(self.counters):
+                lines.append(f"{name:<30} {self.counters[name]:>10}")
+
+        if self.pages and top:
+            lines.append("")
+            lines.append(f"slowest {min(top, len(self.pages))} pages:")
+            for seconds, path in heapq.nlargest(top, self.pages):
+                lines.append(f"  {seconds * 1000:>9.2f} ms  {path}")
+        return "\n".join(lines)
+
+def run_with_capture(fn, cprofile_path=None, trace_memory=False, top=15):
+    profile = cProfile.Profile() if cprofile_path else None
+    if trace_memory:
+        tracemalloc.start()
+    if profile:
+        profile.enable()
+    try:
+        return fn()
+    finally:
+        if profile:
+            profile.disable()
+            profile.dump_stats(cprofile_path)
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+            print(out.getvalue())
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"tracemalloc: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB")
+            for stat in snapshot.statistics("lineno")[:top]:
+                print(f"  {stat}")
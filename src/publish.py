@@ -0,0 +1,51 @@
+import filecmp
+import os
+
+# Outputs are written next to their final path and renamed into place, so a
+# server never sees a half-written file, and an output whose new contents are
+# identical is left alone so it keeps its mtime (and CDN/rsync state)
+
+def temp_path(path):
+    return f"{path}.{os.getpid()}.tmp"
+
+def has_contents(path, data):
+    try:
+        stat = os.stat(path)
+        # A file with other hardlinks is shared with its source, so it is always
+        # replaced by one of our own
+        if stat.st_size != len(data) or stat.st_nlink > 1:
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+def publish_bytes(path, data):
+    # Returns whether the file was written
+    if has_contents(path, data):
+        return False
+    tmp_path = temp_path(path)
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def publish_text(path, text):
+    return publish_bytes(path, text.encode("utf-8"))
+
+def publish_stream(path, write_to):
+    # For outputs too big to hold in memory: write_to gets a text file to write
+    # into, and the result only replaces path if it differs from what is there
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write_to(f)
+        if os.path.isfile(path) and filecmp.cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+        return True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
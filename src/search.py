@@ -0,0 +1,125 @@
+import json
+import os
+import re
+import shutil
+from publish import publish_text
+
+TERM_PATTERN = re.compile(r"\w+")
+MIN_TERM_LENGTH = 2
+PAGES_FILE = "pages.json"
+
+def tokenize(text):
+    return [term for term in TERM_PATTERN.findall(text.lower()) if len(term) >= MIN_TERM_LENGTH]
+
+def shard_name(term):
+    # Terms are sharded by their first two characters, so a client only loads
+    # the file for the prefix being searched
+    return "".join(c if c.isascii() and c.isalnum() else f"_{ord(c):x}" for c in term[:MIN_TERM_LENGTH])
+
+def term_positions(text):
+    positions = {}
+    for position, term in enumerate(tokenize(text)):
+        positions.setdefault(term, []).append(position)
+    return positions
+
+def page_url(output_rel, basepath=None):
+    path = output_rel.replace(os.sep, "/")
+    if path == "index.html" or path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    return (basepath or "/").rstrip("/") + "/" + path
+
+def read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def write_json(path, data):
+    publish_text(path, json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False))
+
+class SearchIndex():
+    # The published shards are the index: an update only loads and rewrites
+    # the shards that hold terms of pages that changed
+    def __init__(self, directory, state):
+        self.directory = directory
+        self.state = state
+        if "next_id" not in state or not os.path.isfile(os.path.join(directory, PAGES_FILE)):
+            # The state or the output was lost, so every page is indexed again from
+            # scratch; old shards would otherwise keep postings under reused ids
+            state.clear()
+            shutil.rmtree(directory, ignore_errors=True)
+        state.setdefault("next_id", 0)
+        state.setdefault("pages", {})
+        self.updated = {}
+        self.removed = set()
+
+    def has_page(self, source_rel):
+        return source_rel in self.state["pages"]
+
+    def indexed_pages(self):
+        return set(self.state["pages"])
+
+    def update_page(self, source_rel, url, title, text):
+        self.removed.discard(source_rel)
+        self.updated[source_rel] = ({"url": url, "title": title}, term_positions(text))
+
+    def remove_page(self, source_rel):
+        self.updated.pop(source_rel, None)
+        if source_rel in self.state["pages"]:
+            self.removed.add(source_rel)
+
+    def write(self):
+        if not self.updated and not self.removed:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        pages = self.state["pages"]
+
+        dirty = {}
+        for source_rel in self.removed | set(self.updated):
+            if source_rel in pages:
+                for name in pages[source_rel]["shards"]:
+                    dirty.setdefault(name, {})
+        stale_ids = {str(pages[source_rel]["id"]) for source_rel in self.removed | set(self.updated) if source_rel in pages}
+
+        for source_rel in self.removed:
+            del pages[source_rel]
+        for source_rel, (meta, positions) in self.updated.items():
+            if source_rel not in pages:
+                pages[source_rel] = {"id": self.state["next_id"]}
+                self.state["next_id"] += 1
+            page_id = str(pages[source_rel]["id"])
+            shards = set()
+            for term, term_positions in positions.items():
+                name = shard_name(term)
+                shards.add(name)
+                dirty.setdefault(name, {}).setdefault(term, {})[page_id] = term_positions
+            pages[source_rel]["shards"] = sorted(shards)
+
+        for name, additions in dirty.items():
+            path = os.path.join(self.directory, name + ".json")
+            postings = read_json(path, {})
+            for term in list(postings):
+                for page_id in stale_ids & postings[term].keys():
+                    del postings[term][page_id]
+                if not postings[term]:
+                    del postings[term]
+            for term, by_page in additions.items():
+                postings.setdefault(term, {}).update(by_page)
+            if postings:
+                write_json(path, postings)
+            elif os.path.exists(path):
+                os.remove(path)
+
+        pages_path = os.path.join(self.directory, PAGES_FILE)
+        metadata = read_json(pages_path, {})
+        for page_id in stale_ids:
+            metadata.pop(page_id, None)
+        for source_rel, (meta, positions) in self.updated.items():
+            metadata[str(pages[source_rel]["id"])] = meta
+        write_json(pages_path, metadata)
+
+        written = len(dirty)
+        self.updated.clear()
+        self.removed.clear()
+        return written
@@ -0,0 +1,136 @@
+import os
+from main_helpers import copy_file, find_markdown_files, output_matches_source, page_options, remove_empty_parents
+from manifest import Manifest, hash_file
+from depgraph import OPTION_PREFIX
+
+# Each shard keeps its manifest inside its output so the directory is a complete CI artifact
+SHARD_MANIFEST = ".shard-manifest.json"
+
+class ShardMergeError(Exception):
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__(f"{len(problems)} problem(s) merging shards:\n" + "\n".join(f"  {problem}" for problem in problems))
+
+def parse_shard(text):
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {text!r}") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"shard index must be between 1 and {count}, got {text!r}")
+    return index, count
+
+def shard_manifest_path(shard_dir):
+    return os.path.join(shard_dir, SHARD_MANIFEST)
+
+def shard_files(shard_dir):
+    files = []
+    for root, dirs, filenames in os.walk(shard_dir):
+        for filename in filenames:
+            relative_path = os.path.relpath(os.path.join(root, filename), shard_dir)
+            if relative_path != SHARD_MANIFEST:
+                files.append(relative_path)
+    return sorted(files)
+
+def merge_shards(shard_dirs, dest_dir, manifest, content_dir=None, basepath="/"):
+    problems = []
+    shards = []
+    for shard_dir in shard_dirs:
+        shard_manifest = Manifest.load(shard_manifest_path(shard_dir))
+        shard = shard_manifest.data.get("shard")
+        if shard is None:
+            problems.append(f"{shard_dir}: no shard manifest")
+            continue
+        shards.append((shard, shard_dir, shard_manifest))
+
+    counts = {shard["count"] for shard, shard_dir, shard_manifest in shards}
+    if len(counts) > 1:
+        problems.append(f"shards come from different splits: {', '.join(str(count) for count in sorted(counts))}")
+    elif counts:
+        count = counts.pop()
+        indexes = [shard["index"] for shard, shard_dir, shard_manifest in shards]
+        for index in range(1, count + 1):
+            if indexes.count(index) == 0:
+                problems.append(f"missing shard {index}/{count}")
+            elif indexes.count(index) > 1:
+                problems.append(f"shard {index}/{count} given more than once")
+
+    # Listings are rendered at merge time, so every shard must have been built with
+    # this merge's basepath and renderer, not just the same ones as each other
+    options = page_options(basepath)
+    for shard, shard_dir, shard_manifest in shards:
+        for node, digest in options.items():
+            if shard_manifest.inputs.get(node, digest) != digest:
+                problems.append(f"{shard_dir}: built with a different {node[len(OPTION_PREFIX):]} than this merge")
+
+    # Shards must agree on the template and anything else they share
+    input_hashes = {}
+    for shard, shard_dir, shard_manifest in shards:
+        for node, digest in shard_manifest.inputs.items():
+            if node in options:
+                continue
+            if input_hashes.setdefault(node, digest) != digest:
+                problems.append(f"{shard_dir}: built from a different {node}")
+
+    owners = {}
+    for shard, shard_dir, shard_manifest in shards:
+        for relative_path in shard_files(shard_dir):
+            if relative_path not in owners:
+                owners[relative_path] = shard_dir
+                continue
+            other = owners[relative_path]
+            if hash_file(os.path.join(other, relative_path)) != hash_file(os.path.join(shard_dir, relative_path)):
+                problems.append(f"{relative_path}: differs between {other} and {shard_dir}")
+
+    pages = {}
+    for shard, shard_dir, shard_manifest in shards:
+        for source_rel, entry in shard_manifest.pages.items():
+            if source_rel in pages:
+                problems.append(f"{source_rel}: built by more than one shard")
+            elif entry["output"] not in owners:
+                problems.append(f"{source_rel}: output {entry['output']} missing from {shard_dir}")
+            pages[source_rel] = entry
+    if content_dir is not None:
+        drafts = {source_rel for shard, shard_dir, shard_manifest in shards for source_rel in shard.get("drafts", ())}
+        for source_rel in find_markdown_files(content_dir):
+            if source_rel not in pages and source_rel not in drafts:
+                problems.append(f"{source_rel}: not built by any shard")
+
+    if problems:
+        raise ShardMergeError(problems)
+
+    # Like the static sync, only changed files are copied, so unchanged outputs keep
+    # their mtime and later incremental steps do not see them as new
+    os.makedirs(dest_dir, exist_ok=True)
+    copied = unchanged = removed = 0
+    for relative_path, shard_dir in sorted(owners.items()):
+        src_path = os.path.join(shard_dir, relative_path)
+        dst_path = os.path.join(dest_dir, relative_path)
+        if output_matches_source(src_path, dst_path, "hash"):
+            unchanged += 1
+            continue
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        copy_file(src_path, dst_path)
+        copied += 1
+    for relative_path in shard_files(dest_dir):
+        dst_path = os.path.join(dest_dir, relative_path)
+        if relative_path in owners or os.path.abspath(dst_path) == os.path.abspath(manifest.path):
+            continue
+        os.remove(dst_path)
+        removed += 1
+        remove_empty_parents(os.path.dirname(dst_path), dest_dir)
+
+    # The merged manifest describes dest_dir, so a later unsharded build stays incremental
+    manifest.clear_outputs()
+    manifest.data.pop("shard", None)
+    for shard, shard_dir, shard_manifest in shards:
+        manifest.pages.update(shard_manifest.pages)
+        manifest.static.update(shard_manifest.static)
+        manifest.compressed.update(shard_manifest.compressed)
+        for output in shard_manifest.graph.inputs:
+            merged_output = os.path.normpath(os.path.join(dest_dir, os.path.relpath(output, shard["output"])))
+            manifest.graph.set_inputs(merged_output, shard_manifest.graph.inputs_of(output))
+    manifest.record_inputs(dict(input_hashes, **options))
+    manifest.save()
+    print(f"Merged {len(shards)} shard(s): {len(pages)} pages, {len(owners)} files "
+          f"({copied} copied, {unchanged} unchanged, {removed} removed)")
@@ -0,0 +1,62 @@
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Root-relative href/src values; "//host/path" is protocol-relative and left alone
+ROOT_URL_PATTERN = re.compile(r'\b(href|src)="/(?!/)')
+
+def rewrite_root_urls(html, basepath):
+    if not basepath or basepath == "/":
+        return html
+    return ROOT_URL_PATTERN.sub(lambda match: f'{match.group(1)}="{basepath}', html)
+
+class Template():
+    def __init__(self, text, basepath = None):
+        # Literals sit at even indexes and placeholder names at odd ones,
+        # so rendering only has to fill the odd slots and join once
+        self.segments = PLACEHOLDER_PATTERN.split(text)
+        self.raw_placeholders = [m.group(0) for m in PLACEHOLDER_PATTERN.finditer(text)]
+        self.basepath = basepath
+
+        # The template's own URLs are rewritten once here instead of on every page
+        for i in range(0, len(self.segments), 2):
+            self.segments[i] = rewrite_root_urls(self.segments[i], basepath)
+
+    @classmethod
+    def load(cls, path, basepath = None):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(f.read(), basepath)
+
+    @property
+    def placeholders(self):
+        return self.segments[1::2]
+
+    def render(self, **values):
+        parts = []
+        self.write(parts.append, **values)
+        return "".join(parts)
+
+    def write(self, write, **values):
+        segments = self.segments
+        for i in range(0, len(segments), 2):
+            if segments[i]:
+                write(segments[i])
+            if i + 1 == len(segments):
+                break
+
+            name = segments[i + 1]
+            if name not in values:
+                # Unknown placeholders are left in the output untouched
+                write(self.raw_placeholders[i // 2])
+                continue
+
+            # Node values are serialized straight into the writer and
+            # iterables of chunks are written as they are produced
+            value = values[name]
+            if isinstance(value, str):
+                write(value)
+            elif hasattr(value, "write_html"):
+                value.write_html(write, self.basepath)
+            else:
+                for chunk in value:
+                    write(chunk)
@@ -0,0 +1,71 @@
+import gzip
+import os
+import tempfile
+import unittest
+from compress import find_compressible, precompress
+from profiler import Profiler
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = self.tmp.name
+        os.makedirs(os.path.join(self.public, "blog"))
+        self.write("index.html", "<p>home</p>" * 200)
+        self.write(os.path.join("blog", "index.html"), "<p>post</p>" * 200)
+        self.write("index.css", "body {}")
+        self.write("logo.png", "x" * 5000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, relative_path, text):
+        with open(os.path.join(self.public, relative_path), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def gz(self, relative_path):
+        return os.path.join(self.public, relative_path + ".gz")
+
+    def test_only_text_files_above_threshold(self):
+        self.assertEqual(find_compressible(self.public), ["blog/index.html", "index.html"])
+        self.assertEqual(find_compressible(self.public, min_size=0), ["blog/index.html", "index.css", "index.html"])
+
+    def test_sidecar_round_trips_and_is_reproducible(self):
+        precompress(self.public)
+        with open(self.gz("index.html"), "rb") as f:
+            first = f.read()
+        self.assertEqual(gzip.decompress(first).decode("utf-8"), "<p>home</p>" * 200)
+
+        os.remove(self.gz("index.html"))
+        precompress(self.public)
+        with open(self.gz("index.html"), "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_unchanged_files_are_skipped(self):
+        hashes = precompress(self.public, jobs=2)
+        inode = os.stat(self.gz("index.html")).st_ino
+        self.write(os.path.join("blog", "index.html"), "<p>edited</p>" * 200)
+        precompress(self.public, hashes)
+        self.assertEqual(os.stat(self.gz("index.html")).st_ino, inode)
+        with gzip.open(self.gz(os.path.join("blog", "index.html")), "rt") as f:
+            self.assertIn("edited", f.read())
+
+    def test_written_sidecar_bytes_are_profiled(self):
+        profiler = Profiler()
+        hashes = precompress(self.public, profiler=profiler)
+        sizes = os.path.getsize(self.gz("index.html")) + os.path.getsize(self.gz(os.path.join("blog", "index.html")))
+        self.assertEqual(profiler.phases["compress"][2], sizes)
+        precompress(self.public, hashes, profiler=profiler)
+        self.assertEqual(profiler.phases["compress"][2], sizes)
+
+    def test_stale_sidecars_are_removed(self):
+        hashes = precompress(self.public)
+        os.remove(os.path.join(self.public, "index.html"))
+        self.write(os.path.join("blog", "index.html"), "tiny")
+        self.assertEqual(precompress(self.public, hashes), {})
+        self.assertFalse(os.path.exists(self.gz("index.html")))
+        self.assertFalse(os.path.exists(self.gz(os.path.join("blog", "index.html"))))
+
+
+if __name__ == "__main__":
+    unittest.main()
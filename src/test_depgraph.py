@@ -0,0 +1,39 @@
+import unittest
+from depgraph import DependencyGraph, explain
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = DependencyGraph({
+            "docs/index.html": ["content/index.md", "template.html", "option:basepath"],
+            "docs/post.html": ["content/post.md", "template.html", "option:basepath"],
+            "docs/archive.html": ["docs/post.html"],
+        })
+
+    def test_affected(self):
+        self.assertEqual(self.graph.affected(["content/index.md"]), ["docs/index.html"])
+        self.assertEqual(self.graph.affected(["content/post.md"]), ["docs/archive.html", "docs/post.html"])
+        self.assertEqual(len(self.graph.affected(["template.html"])), 3)
+        self.assertEqual(self.graph.affected(["unrelated.css"]), [])
+
+    def test_set_inputs_replaces_edges(self):
+        self.graph.set_inputs("docs/index.html", ["content/home.md"])
+        self.assertEqual(self.graph.affected(["content/index.md"]), [])
+        self.assertEqual(self.graph.affected(["content/home.md"]), ["docs/index.html"])
+        self.assertEqual(self.graph.affected(["template.html"]), ["docs/archive.html", "docs/post.html"])
+
+    def test_retain_drops_outputs_and_their_edges(self):
+        self.graph.retain(["docs/index.html"])
+        self.assertNotIn("docs/post.html", self.graph)
+        self.assertNotIn("content/post.md", self.graph.dependents)
+        self.assertEqual(DependencyGraph(self.graph.to_data()).to_data(), self.graph.to_data())
+
+    def test_explain(self):
+        text = explain(self.graph, "./docs/post.html")
+        self.assertIn("docs/post.html is built from:\n  content/post.md", text)
+        self.assertIn("rebuilds 1 output(s):\n  docs/archive.html", text)
+        self.assertIn("rebuilds 0 output(s)", explain(self.graph, "option:jobs"))
+
+
+if __name__ == "__main__":
+    unittest.main()
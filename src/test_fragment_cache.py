@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import fragment_cache
+from fragment_cache import FragmentCache
+
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = FragmentCache(os.path.join(self.tmp.name, "fragments"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        key = self.cache.key("# Title", "/")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {"title": "Title", "html": "<div><h1>Title</h1></div>"})
+        self.assertEqual(self.cache.get(key)["html"], "<div><h1>Title</h1></div>")
+
+    def test_key_depends_on_markdown_and_basepath(self):
+        self.assertEqual(self.cache.key("a", "/"), self.cache.key("a", "/"))
+        self.assertNotEqual(self.cache.key("a", "/"), self.cache.key("b", "/"))
+        self.assertNotEqual(self.cache.key("a", "/"), self.cache.key("a", "/site/"))
+
+    def test_key_depends_on_the_highlighter_version(self):
+        key = self.cache.key("```python\nx = 1\n```", "/")
+        saved = fragment_cache.HIGHLIGHTER_VERSION
+        fragment_cache.HIGHLIGHTER_VERSION = saved + 1
+        try:
+            self.assertNotEqual(self.cache.key("```python\nx = 1\n```", "/"), key)
+        finally:
+            fragment_cache.HIGHLIGHTER_VERSION = saved
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = self.cache.key("x")
+        path = self.cache.path(key)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write("{")
+        self.assertIsNone(self.cache.get(key))
+
+    def test_prune_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, {"title": "t", "html": "x" * 100})
+            os.utime(self.cache.path(key), ns=(i * 10**9, i * 10**9))
+        # Reading the oldest entry makes it the most recently used
+        self.cache.get(keys[0])
+
+        entry_size = os.path.getsize(self.cache.path(keys[0]))
+        self.cache.max_bytes = entry_size * 2
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import io
+import os
+import tempfile
+import unittest
+from frontmatter import FrontMatterError, parse_front_matter, read_front_matter, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse(self):
+        text = "---\ntitle: \"Hello: World\"\ndate: 2024-01-05\ntags: [a, b ,c]\ndraft: yes\nauthor: Me\n---\n# Body\n"
+        meta, header_lines = parse_front_matter(io.StringIO(text))
+        self.assertEqual(meta, {"title": "Hello: World", "date": "2024-01-05", "tags": ["a", "b", "c"], "draft": True, "author": "Me"})
+        self.assertEqual(header_lines, 7)
+
+    def test_no_front_matter(self):
+        self.assertEqual(parse_front_matter(io.StringIO("# Title\n---\n")), ({}, 0))
+        self.assertEqual(split_front_matter("# Title"), ({}, "# Title"))
+
+    def test_body_keeps_its_line_numbers(self):
+        meta, body = split_front_matter("---\ntags: x, y\n---\n# Title\n\ntext")
+        self.assertEqual(meta, {"tags": ["x", "y"]})
+        self.assertEqual(body, "\n\n\n# Title\n\ntext")
+
+    def test_errors(self):
+        for text in ("---\ndate: 5 May\n---\n", "---\ndraft: maybe\n---\n"):
+            with self.assertRaises(FrontMatterError, msg=text):
+                split_front_matter(text)
+
+    def test_unclosed_or_plain_header_is_body(self):
+        for text in ("---\n# Title\n\nSome text", "---\njust words\n---\n# Title", "---\ntitle: x\n# Title"):
+            self.assertEqual(parse_front_matter(io.StringIO(text)), ({}, 0), msg=text)
+            self.assertEqual(split_front_matter(text), ({}, text), msg=text)
+
+    def test_read_stops_after_the_header(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("---\ntitle: Post\n---\n" + "body line\n" * 1000 + "\xff")
+            self.assertEqual(read_front_matter(path), ({"title": "Post"}, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import time
+import unittest
+from fragment_cache import FragmentCache
+from highlight import cache_key, highlight, highlighter
+
+
+class TestHighlight(unittest.TestCase):
+    def test_python(self):
+        self.assertEqual(
+            highlight("python", "def f(x):\n    return len(x) # n<1\n"),
+            '<span class="hl-keyword">def</span> f(x):\n    <span class="hl-keyword">return</span> '
+            '<span class="hl-builtin">len</span>(x) <span class="hl-comment"># n&lt;1</span>\n',
+        )
+        # Keywords inside names and numbers inside names are left alone
+        self.assertEqual(highlight("py", "if_x = x1"), "if_x = x1")
+
+    def test_shell(self):
+        self.assertEqual(
+            highlight("bash", 'echo "$HOME" ./test.sh --all # done'),
+            '<span class="hl-builtin">echo</span> <span class="hl-string">"$HOME"</span> ./test.sh '
+            '<span class="hl-attr">--all</span> <span class="hl-comment"># done</span>',
+        )
+        self.assertEqual(highlight("sh", "echo a#b"), '<span class="hl-builtin">echo</span> a#b')
+
+    def test_json(self):
+        self.assertEqual(
+            highlight("json", '{"a": [1, "b", true]}'),
+            '{<span class="hl-attr">"a"</span>: [<span class="hl-number">1</span>, '
+            '<span class="hl-string">"b"</span>, <span class="hl-keyword">true</span>]}',
+        )
+
+    def test_html_is_escaped(self):
+        self.assertEqual(
+            highlight("html", '<a href="/x">&amp;</a>'),
+            '<span class="hl-tag">&lt;a</span> <span class="hl-attr">href</span>=<span class="hl-string">"/x"</span>'
+            '<span class="hl-tag">&gt;</span><span class="hl-var">&amp;amp;</span>'
+            '<span class="hl-tag">&lt;/a</span><span class="hl-tag">&gt;</span>',
+        )
+
+    def test_unknown_language(self):
+        self.assertIsNone(highlight("rust", "fn main() {}"))
+
+    def test_adversarial_code_is_highlighted_in_one_pass(self):
+        # A rule that rescans a run from every position inside it needs minutes
+        # on these; one pass takes well under a second
+        cases = [("python", "'''x "), ("python", '"'), ("shell", "'"), ("html", "<!--"),
+                 ("html", "a-"), ("html", "a:"), ("html", "&a"), ("json", '"a')]
+        for language, unit in cases:
+            code = unit * (400000 // len(unit))
+            start = time.perf_counter()
+            self.assertIsNotNone(highlight(language, code))
+            self.assertLess(time.perf_counter() - start, 20, (language, unit))
+
+    def test_attributes_need_an_equals_sign(self):
+        self.assertEqual(highlight("html", "a-b c:d"), "a-b c:d")
+        self.assertEqual(highlight("html", "data-x=1"), '<span class="hl-attr">data-x</span>=1')
+
+    def test_persistent_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = FragmentCache(tmp)
+            expected = highlight("python", "x = 1")
+            self.assertEqual(highlighter(cache)("python", "x = 1"), expected)
+            key = cache_key("py", "x = 1")
+            self.assertEqual(cache.get(key), {"html": expected})
+
+            cache.put(key, {"html": "from the cache"})
+            self.assertEqual(highlighter(cache)("python", "x = 1"), "from the cache")
+            self.assertIsNone(highlighter(cache)("rust", "x"))
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
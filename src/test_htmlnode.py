@@ -37,6 +37,21 @@ class TestHTMLNode(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             node.to_html()
 
+    def test_eq(self):
+        self.assertEqual(HTMLNode("p", "a", None, {"id": "x"}), HTMLNode("p", "a", None, {"id": "x"}))
+        self.assertNotEqual(HTMLNode("p", "a"), HTMLNode("p", "b"))
+        self.assertNotEqual(HTMLNode("p", "a"), "p")
+
+    def test_no_instance_dict(self):
+        node = HTMLNode("p", "text")
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = 1
+
+    def test_tags_are_interned(self):
+        tag = "".join(["sec", "tion"])
+        self.assertIs(HTMLNode(tag).tag, HTMLNode("section").tag)
+
 
 if __name__ == "__main__":
     unittest.main()
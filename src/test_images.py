@@ -0,0 +1,88 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from images import optimize_png, optimize_images, read_chunks, write_chunk, PNG_SIGNATURE
+
+
+def make_png(ancillary=(), level=1, idat_parts=1):
+    width = height = 16
+    rows = b"".join(b"\x00" + bytes((x * 16 + y) % 256 for x in range(width * 3)) for y in range(height))
+    data = zlib.compress(rows, level)
+    step = len(data) // idat_parts + 1
+    chunks = [write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))]
+    chunks += [write_chunk(chunk_type, body) for chunk_type, body in ancillary]
+    chunks += [write_chunk(b"IDAT", data[i:i + step]) for i in range(0, len(data), step)]
+    chunks.append(write_chunk(b"IEND", b""))
+    return PNG_SIGNATURE + b"".join(chunks), rows
+
+
+def pixels(png):
+    return zlib.decompress(b"".join(body for chunk_type, body in read_chunks(png) if chunk_type == b"IDAT"))
+
+
+class TestOptimizePng(unittest.TestCase):
+    def test_pixels_are_unchanged(self):
+        png, rows = make_png(level=0, idat_parts=3)
+        optimized = optimize_png(png)
+        self.assertLess(len(optimized), len(png))
+        self.assertEqual(pixels(optimized), rows)
+        self.assertEqual([chunk_type for chunk_type, body in read_chunks(optimized)], [b"IHDR", b"IDAT", b"IEND"])
+
+    def test_strips_metadata_but_keeps_colour_chunks(self):
+        png, rows = make_png([(b"tEXt", b"Comment\x00" + b"x" * 200), (b"gAMA", struct.pack(">I", 45455))])
+        types = [chunk_type for chunk_type, body in read_chunks(optimize_png(png))]
+        self.assertIn(b"gAMA", types)
+        self.assertNotIn(b"tEXt", types)
+
+    def test_never_grows(self):
+        png, rows = make_png(level=9)
+        self.assertLessEqual(len(optimize_png(png)), len(png))
+
+    def test_animated_png_is_left_alone(self):
+        png, rows = make_png([(b"acTL", struct.pack(">II", 1, 0)), (b"tEXt", b"a\x00b")], level=0)
+        self.assertEqual(optimize_png(png), png)
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            optimize_png(b"GIF89a")
+
+
+class TestOptimizeImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "images")
+        self.pairs = []
+        for i in range(3):
+            png, rows = make_png([(b"tEXt", b"n\x00" + bytes([i]))], level=0)
+            src = os.path.join(self.tmp.name, f"{i}.png")
+            with open(src, "wb") as f:
+                f.write(png)
+            self.pairs.append((src, os.path.join(self.tmp.name, f"out{i}.png")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_results_are_cached_by_source_hash(self):
+        first = optimize_images(self.pairs, self.cache_dir, jobs=2)
+        self.assertEqual([cached for before, after, cached in first], [False] * 3)
+        self.assertTrue(all(after < before for before, after, cached in first))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+        second = optimize_images(self.pairs, self.cache_dir)
+        self.assertEqual([cached for before, after, cached in second], [True] * 3)
+        with open(self.pairs[0][1], "rb") as f:
+            self.assertEqual(pixels(f.read()), make_png()[1])
+
+    def test_unreadable_image_is_copied_unchanged(self):
+        src, dst = self.pairs[0]
+        with open(src, "wb") as f:
+            f.write(b"not really a png")
+        optimize_images([(src, dst)], self.cache_dir)
+        with open(dst, "rb") as f:
+            self.assertEqual(f.read(), b"not really a png")
+
+
+if __name__ == "__main__":
+    unittest.main()
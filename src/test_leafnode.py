@@ -1,5 +1,8 @@
+import copy
+import pickle
 import unittest
 from leafnode import LeafNode
+from parentnode import ParentNode
 
 
 class TestLeafNode(unittest.TestCase):
@@ -64,6 +67,39 @@ class TestLeafNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             node.to_html()
 
+    def test_empty_props_are_shared_and_read_only(self):
+        """Leaves without props share one immutable empty mapping."""
+        node1 = LeafNode(None, "a")
+        node2 = LeafNode("b", "c", {})
+        self.assertIs(node1.props, node2.props)
+        with self.assertRaises(TypeError):
+            node1.props["class"] = "x"
+
+    def test_pickle_and_deepcopy_keep_the_shared_props(self):
+        """Nodes without props survive pickling and deepcopy, still sharing one mapping."""
+        node = ParentNode("p", [LeafNode(None, "a"), LeafNode("a", "b", {"href": "/x"})])
+        for copied in (pickle.loads(pickle.dumps(node)), copy.deepcopy(node)):
+            self.assertEqual(copied, node)
+            self.assertIs(copied.props, node.children[0].props)
+            self.assertIs(copied.children[0].props, LeafNode(None, "c").props)
+
+    def test_repr_empty_props(self):
+        """Shared empty props still repr as a plain dict."""
+        self.assertIn("props={}", repr(LeafNode("p", "Hello")))
+
+    def test_to_html_basepath_rewrites_root_relative_urls(self):
+        """Root-relative href/src get the basepath, other props and values do not."""
+        link = LeafNode("a", 'href="/x"', {"href": "/blog", "title": "/t"})
+        self.assertEqual(link.to_html("/site/"), '<a href="/site/blog" title="/t">href="/x"</a>')
+        image = LeafNode("img", "", {"src": "/images/a.png", "alt": "a"})
+        self.assertEqual(image.to_html("/site/"), '<img src="/site/images/a.png" alt="a">')
+        external = LeafNode("a", "x", {"href": "https://example.com/"})
+        self.assertEqual(external.to_html("/site/"), '<a href="https://example.com/">x</a>')
+
+    def test_to_html_basepath_skips_protocol_relative_urls(self):
+        image = LeafNode("img", "", {"src": "//cdn.example.com/a.png", "alt": "x"})
+        self.assertEqual(image.to_html("/site/"), '<img src="//cdn.example.com/a.png" alt="x">')
+
 
 if __name__ == "__main__":
     unittest.main()
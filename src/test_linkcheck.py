@@ -0,0 +1,37 @@
+import unittest
+from linkcheck import find_broken_links, link_target, output_index, target_exists
+
+
+class TestLinkCheck(unittest.TestCase):
+    def setUp(self):
+        self.outputs = output_index(["index.html", "blog/post/index.html", "about.html", "images/a.png"])
+
+    def test_link_target(self):
+        self.assertEqual(link_target("/images/a.png", "index.html"), "images/a.png")
+        self.assertEqual(link_target("/blog/post#top", "index.html"), "blog/post")
+        self.assertEqual(link_target("../../images/a.png?v=2", "blog/post/index.html"), "images/a.png")
+        self.assertEqual(link_target("/blog/post/", "index.html"), "blog/post/")
+        self.assertEqual(link_target("/", "about.html"), "")
+        self.assertEqual(link_target("/images/a%20b.png", "index.html"), "images/a b.png")
+        for url in ("https://example.com/x", "mailto:me@example.com", "//cdn.example.com/x.js", "#section"):
+            self.assertIsNone(link_target(url, "index.html"))
+
+    def test_target_exists(self):
+        for target in ("", "blog/post", "blog/post/", "about", "about.html", "images/a.png"):
+            self.assertTrue(target_exists(target, self.outputs), target)
+        for target in ("blog", "images/b.png", "post"):
+            self.assertFalse(target_exists(target, self.outputs), target)
+
+    def test_find_broken_links(self):
+        pages = {
+            "content/index.md": ("index.html", [(3, "/blog/post"), (7, "/blog/missing"), (9, "https://example.com")]),
+            "content/blog/post/index.md": ("blog/post/index.html", [[2, "../../images/b.png"]]),
+        }
+        self.assertEqual(find_broken_links(pages, self.outputs), [
+            ("content/blog/post/index.md", 2, "../../images/b.png"),
+            ("content/index.md", 7, "/blog/missing"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from listings import blog_index_html, feed_xml, find_posts, generate_listings, sitemap_xml
+from manifest import Manifest
+
+
+def page(output, **meta):
+    return {"output": output, "links": [], "meta": meta}
+
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        self.pages = {
+            "index.md": page("index.html", title="Home"),
+            "blog/old.md": page("blog/old.html", title="Old", date="2023-01-02"),
+            "blog/new.md": page("blog/new.html", title="New & shiny", date="2024-06-01", tags=["x"]),
+            "blog/undated.md": page("blog/undated.html", title="Undated"),
+        }
+
+    def test_posts_are_newest_first(self):
+        self.assertEqual([source for source, entry in find_posts(self.pages)], ["blog/new.md", "blog/old.md", "blog/undated.md"])
+
+    def test_blog_index(self):
+        html = blog_index_html(find_posts(self.pages), "/site/")
+        self.assertIn('<a href="/site/blog/new.html">New &amp; shiny</a> <time datetime="2024-06-01">', html)
+        self.assertLess(html.index("New"), html.index("Old"))
+
+    def test_sitemap_and_feed(self):
+        sitemap = sitemap_xml(self.pages, "https://example.com/", "/site/")
+        self.assertIn("<loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<lastmod>2023-01-02</lastmod>", sitemap)
+
+        feed = feed_xml(find_posts(self.pages), "https://example.com", "/site/")
+        self.assertIn("<title>New &amp; shiny</title>", feed)
+        self.assertIn("<pubDate>Sat, 01 Jun 2024 00:00:00 +0000</pubDate>", feed)
+        self.assertIn("<category>x</category>", feed)
+        self.assertNotIn("Undated", feed)
+
+
+class TestGenerateListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w", encoding="utf-8") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.manifest.record_page("blog/a.md", "blog/a.html", meta={"title": "A", "date": "2024-01-01"})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, site_url="https://example.com"):
+        previous = dict(self.manifest.inputs)
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            generate_listings(self.manifest, self.public, self.template, "/", site_url, previous, "blog")
+        return out.getvalue()
+
+    def test_only_rewritten_when_metadata_changes(self):
+        self.assertIn("3 written", self.generate())
+        self.assertIn("0 written, 3 unchanged", self.generate())
+
+        self.manifest.record_page("blog/b.md", "blog/b.html", meta={"title": "B"})
+        self.assertIn("3 written", self.generate())
+
+        with open(self.template, "a", encoding="utf-8") as f:
+            f.write("<footer></footer>")
+        self.assertIn("1 written, 2 unchanged", self.generate())
+
+    def test_dropped_outputs_are_removed(self):
+        self.generate()
+        self.generate(site_url=None)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "feed.xml")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
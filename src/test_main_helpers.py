@@ -1,5 +1,14 @@
+import json
+import os
+import tempfile
 import unittest
-from main_helpers import extract_title
+import main_helpers
+from main_helpers import extract_title, generate_pages_recursive, PageBuildError, sync_dir, write_page, read_title
+from manifest import Manifest
+from template import Template
+from profiler import Profiler
+from fragment_cache import FragmentCache
+from search import SearchIndex
 
 class TestExtractTitle(unittest.TestCase):
 
@@ -33,5 +42,368 @@ class TestExtractTitle(unittest.TestCase):
         markdown = "# Title with # symbol inside"
         self.assertEqual(extract_title(markdown), "Title with # symbol inside")
 
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.manifest = Manifest(os.path.join(self.tmp.name, "manifest.json"))
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def build(self, basepath="/", jobs=1):
+        generate_pages_recursive(self.content, self.template, self.dest, basepath=basepath, manifest=self.manifest, jobs=jobs)
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        self.build()
+        post = os.path.join(self.dest, "blog", "post.html")
+        self.write(post, "untouched")
+        self.write(os.path.join(self.content, "index.md"), "# New Home")
+        self.build()
+        self.assertEqual(self.read(post), "untouched")
+        self.assertIn("New Home", self.read(os.path.join(self.dest, "index.html")))
+
+    def test_identical_render_keeps_the_output_mtime(self):
+        self.build()
+        post = os.path.join(self.dest, "blog", "post.html")
+        os.utime(post, ns=(0, 0))
+        # A trailing blank line changes the source hash but not the HTML
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n")
+        for io_threads in (0, 2):
+            generate_pages_recursive(self.content, self.template, self.dest, basepath="/", manifest=self.manifest, io_threads=io_threads)
+            self.assertEqual(os.stat(post).st_mtime_ns, 0)
+            self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n")
+        self.assertEqual([name for name in os.listdir(os.path.dirname(post)) if name.endswith(".tmp")], [])
+
+        saved = main_helpers.STREAM_THRESHOLD_BYTES
+        main_helpers.STREAM_THRESHOLD_BYTES = 0
+        try:
+            self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n\n")
+            self.build()
+        finally:
+            main_helpers.STREAM_THRESHOLD_BYTES = saved
+        self.assertEqual(os.stat(post).st_mtime_ns, 0)
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        post = os.path.join(self.dest, "blog", "post.html")
+        self.write(post, "stale")
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        self.assertTrue(self.read(post).startswith("<h1>Post</h1>"))
+
+    def test_basepath_change_rebuilds_everything(self):
+        self.build()
+        post = os.path.join(self.dest, "blog", "post.html")
+        self.write(post, "stale")
+        self.build("/site/")
+        self.assertNotEqual(self.read(post), "stale")
+
+    def test_dependency_graph_is_recorded(self):
+        self.build()
+        post = os.path.normpath(os.path.join(self.dest, "blog", "post.html"))
+        self.assertEqual(self.manifest.graph.inputs_of(post), sorted([
+            os.path.normpath(os.path.join(self.content, "blog", "post.md")),
+            os.path.normpath(self.template),
+            "option:basepath",
+            "option:renderer",
+        ]))
+        self.assertEqual(len(self.manifest.graph.affected([os.path.normpath(self.template)])), 2)
+
+    def test_highlighter_change_rebuilds_everything(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n```python\nx = 1\n```")
+        self.build()
+        post = os.path.join(self.dest, "blog", "post.html")
+        self.write(post, "stale")
+        saved = main_helpers.HIGHLIGHTER_VERSION
+        main_helpers.HIGHLIGHTER_VERSION = saved + 1
+        try:
+            self.build()
+        finally:
+            main_helpers.HIGHLIGHTER_VERSION = saved
+        self.assertIn('<code class="language-python">', self.read(post))
+
+    def test_pages_recorded_without_the_renderer_are_rebuilt(self):
+        self.build()
+        post = os.path.join(self.dest, "blog", "post.html")
+        post_node = os.path.normpath(post)
+        inputs = [node for node in self.manifest.graph.inputs_of(post_node) if node != "option:renderer"]
+        self.manifest.graph.set_inputs(post_node, inputs)
+        del self.manifest.inputs["option:renderer"]
+        self.write(post, "stale")
+        self.build()
+        self.assertIn("<h1>Post</h1>", self.read(post))
+
+    def test_page_that_failed_under_a_new_template_is_retried(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "no title")
+        with self.assertRaises(PageBuildError):
+            self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.build()
+        self.assertTrue(self.read(os.path.join(self.dest, "index.html")).startswith("<h1>Home</h1>"))
+
+    def test_links_of_unchanged_pages_are_kept(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post) [gone](/blog/gone)")
+        self.build()
+        self.build()
+        self.assertEqual(self.manifest.pages["index.md"]["links"], [[3, "/blog/post"], [3, "/blog/gone"]])
+        broken = main_helpers.check_links(self.manifest, self.content)
+        self.assertEqual(broken, [(os.path.join(self.content, "index.md"), 3, "/blog/gone")])
+
+    def test_parser_change_rederives_links_of_unchanged_pages(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post)")
+        self.build()
+        self.manifest.pages["index.md"]["links"] = [[1, "/blog/post"]]  # as an older parser recorded it
+        saved = main_helpers.PARSER_VERSION
+        main_helpers.PARSER_VERSION = saved + 1
+        try:
+            self.build()
+        finally:
+            main_helpers.PARSER_VERSION = saved
+        self.assertEqual(self.manifest.pages["index.md"]["links"], [[3, "/blog/post"]])
+
+    def test_search_index_covers_pages_built_before_it_was_enabled(self):
+        self.build()
+        index = SearchIndex(os.path.join(self.dest, "search"), self.manifest.search)
+        generate_pages_recursive(self.content, self.template, self.dest, basepath="/", manifest=self.manifest, search_index=index)
+        self.assertTrue(index.has_page("index.md"))
+        self.assertTrue(index.has_page(os.path.join("blog", "post.md")))
+        with open(os.path.join(self.dest, "search", "po.json"), encoding="utf-8") as f:
+            self.assertIn("post", json.load(f))
+
+    def test_front_matter_and_drafts(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "---\ntitle: From Header\ndate: 2024-02-03\n---\nNo heading [x](/nope)")
+        self.write(os.path.join(self.content, "draft.md"), "---\ndraft: true\n---\n# Draft")
+        self.build()
+        self.assertTrue(self.read(os.path.join(self.dest, "blog", "post.html")).startswith("<title>From Header</title><div><p>"))
+        self.assertEqual(self.manifest.pages[os.path.join("blog", "post.md")]["meta"], {"title": "From Header", "date": "2024-02-03"})
+        self.assertEqual(self.manifest.pages[os.path.join("blog", "post.md")]["links"], [[5, "/nope"]])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "draft.html")))
+
+        generate_pages_recursive(self.content, self.template, self.dest, basepath="/", manifest=self.manifest, drafts=True)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "draft.html")))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "draft.html")))
+
+    def test_unclosed_front_matter_fence_is_body(self):
+        self.write(os.path.join(self.content, "blog", "post.md"), "---\n\n# Post\n\nNo closing fence")
+        self.build()
+        self.assertEqual(self.read(os.path.join(self.dest, "blog", "post.html")),
+                         "<title>Post</title><div><p>---</p><h1>Post</h1><p>No closing fence</p></div>")
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        post = os.path.join(self.dest, "blog", "post.html")
+        os.remove(post)
+        self.build()
+        self.assertTrue(os.path.exists(post))
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertNotIn(os.path.join("blog", "post.md"), self.manifest.pages)
+
+    def test_parallel_build_matches_serial(self):
+        for i in range(8):
+            self.write(os.path.join(self.content, "blog", f"p{i}.md"), f"# Post {i}\n\nSome **text**")
+        self.build()
+        serial = {name: self.read(os.path.join(self.dest, "blog", name)) for name in os.listdir(os.path.join(self.dest, "blog"))}
+
+        self.manifest.clear_outputs()
+        for name in serial:
+            os.remove(os.path.join(self.dest, "blog", name))
+        self.build(jobs=3)
+        parallel = {name: self.read(os.path.join(self.dest, "blog", name)) for name in os.listdir(os.path.join(self.dest, "blog"))}
+        self.assertEqual(serial, parallel)
+
+    def test_profiler_collects_phases_from_workers(self):
+        for jobs in (1, 2):
+            self.manifest.clear_outputs()
+            profiler = Profiler()
+            generate_pages_recursive(self.content, self.template, self.dest, basepath="/", manifest=self.manifest, jobs=jobs, profiler=profiler)
+            for phase in ("discovery", "read", "parse", "render", "template fill", "write"):
+                self.assertIn(phase, profiler.phases)
+            self.assertEqual(profiler.phases["read"][1], 2)
+            self.assertEqual(len(profiler.pages), 2)
+
+    def test_fragment_cache_is_reused_by_a_fresh_checkout(self):
+        cache = FragmentCache(os.path.join(self.tmp.name, "fragments"))
+        profiler = Profiler()
+        generate_pages_recursive(self.content, self.template, self.dest, basepath="/", manifest=self.manifest, profiler=profiler, cache=cache)
+        self.assertEqual(profiler.counters, {"fragment cache misses": 2})
+        first = self.read(os.path.join(self.dest, "index.html"))
+
+        # Another output tree with no manifest history renders from the cache
+        other_dest = os.path.join(self.tmp.name, "other")
+        profiler = Profiler()
+        generate_pages_recursive(self.content, self.template, other_dest, basepath="/",
+                                 manifest=Manifest(os.path.join(self.tmp.name, "m2.json")), jobs=2, profiler=profiler, cache=cache)
+        self.assertEqual(profiler.counters, {"fragment cache hits": 2})
+        self.assertNotIn("parse", profiler.phases)
+        self.assertEqual(self.read(os.path.join(other_dest, "index.html")), first)
+
+    def test_pipelined_build_matches_serial(self):
+        for i in range(6):
+            self.write(os.path.join(self.content, "blog", f"p{i}.md"), f"# Post {i}\n\n[home](/index.html)")
+        self.build("/site/")
+        serial = {name: self.read(os.path.join(self.dest, "blog", name)) for name in os.listdir(os.path.join(self.dest, "blog"))}
+
+        self.manifest.clear_outputs()
+        for name in serial:
+            os.remove(os.path.join(self.dest, "blog", name))
+        profiler = Profiler()
+        generate_pages_recursive(self.content, self.template, self.dest, basepath="/site/", manifest=self.manifest,
+                                 profiler=profiler, io_threads=2, queue_depth=2)
+        pipelined = {name: self.read(os.path.join(self.dest, "blog", name)) for name in os.listdir(os.path.join(self.dest, "blog"))}
+        self.assertEqual(serial, pipelined)
+        self.assertEqual(profiler.phases["write"][1], 8)
+        self.assertEqual(len(profiler.pages), 8)
+
+    def test_failures_are_reported_in_order(self):
+        self.write(os.path.join(self.content, "b.md"), "no title")
+        self.write(os.path.join(self.content, "a.md"), "no title either")
+        for jobs, io_threads in ((1, 0), (2, 0), (1, 2)):
+            with self.assertRaises(PageBuildError) as ctx:
+                generate_pages_recursive(self.content, self.template, self.dest, basepath="/", manifest=self.manifest, jobs=jobs,
+                                         io_threads=io_threads)
+            failed = [os.path.basename(path) for path, error in ctx.exception.failures]
+            self.assertEqual(failed, ["a.md", "b.md"])
+            self.assertIn("No title found", str(ctx.exception))
+        # Pages that did build are still recorded
+        self.assertIn("index.md", self.manifest.pages)
+        self.assertNotIn("a.md", self.manifest.pages)
+
+class TestStreamingPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "page.md")
+        with open(self.source, "w", encoding="utf-8") as f:
+            f.write("Intro\n\n# The Title\n\nA [link](/blog) and ![img](/images/a.png)\n\n- one\n- two\n")
+        self.template = Template('<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, threshold, basepath):
+        dest = os.path.join(self.tmp.name, f"out-{threshold}.html")
+        saved = main_helpers.STREAM_THRESHOLD_BYTES
+        main_helpers.STREAM_THRESHOLD_BYTES = threshold
+        try:
+            write_page(self.source, self.template, dest, basepath)
+        finally:
+            main_helpers.STREAM_THRESHOLD_BYTES = saved
+        with open(dest, encoding="utf-8") as f:
+            return f.read()
+
+    def test_streaming_output_matches_in_memory(self):
+        for basepath in ("/", "/site/"):
+            self.assertEqual(self.render(0, basepath), self.render(1 << 30, basepath))
+
+    def test_read_title(self):
+        self.assertEqual(read_title(self.source), "The Title")
+
+class TestSyncDir(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(self.dest)
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_copies_new_files(self):
+        synced = sync_dir(self.static, self.dest)
+        self.assertEqual(sorted(synced), ["images/a.png", "index.css"])
+        self.assertEqual(self.read(os.path.join(self.dest, "images", "a.png")), "png")
+
+    def test_unchanged_files_are_not_copied(self):
+        synced = sync_dir(self.static, self.dest)
+        css = os.path.join(self.dest, "index.css")
+        inode = os.stat(css).st_ino
+        sync_dir(self.static, self.dest, synced)
+        self.assertEqual(os.stat(css).st_ino, inode)
+
+    def test_copied_bytes_are_profiled(self):
+        profiler = Profiler()
+        synced = sync_dir(self.static, self.dest, profiler=profiler)
+        self.assertEqual(profiler.phases["static copy"][2], len("body {}") + len("png"))
+        sync_dir(self.static, self.dest, synced, profiler=profiler)
+        self.assertEqual(profiler.phases["static copy"][2], len("body {}") + len("png"))
+
+    def test_existing_identical_output_is_kept_without_history(self):
+        sync_dir(self.static, self.dest)
+        css = os.path.join(self.dest, "index.css")
+        inode = os.stat(css).st_ino
+        sync_dir(self.static, self.dest, {})
+        self.assertEqual(os.stat(css).st_ino, inode)
+
+    def test_changed_file_is_copied(self):
+        for compare in ("mtime", "hash"):
+            synced = sync_dir(self.static, self.dest, compare=compare)
+            self.write(os.path.join(self.static, "index.css"), f"body {{ color: red; }} /* {compare} */")
+            sync_dir(self.static, self.dest, synced, compare)
+            self.assertIn(compare, self.read(os.path.join(self.dest, "index.css")))
+
+    def test_removed_files_are_deleted(self):
+        synced = sync_dir(self.static, self.dest)
+        self.write(os.path.join(self.dest, "page.html"), "not a static file")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        sync_dir(self.static, self.dest, synced)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "page.html")))
+
+    def test_hardlink(self):
+        sync_dir(self.static, self.dest, link=True)
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.static, "index.css"),
+            os.path.join(self.dest, "index.css"),
+        ))
+
+    def test_optimized_images_never_touch_linked_sources(self):
+        cache_dir = os.path.join(self.tmp.name, "images")
+        synced = sync_dir(self.static, self.dest, link=True)
+        source = os.path.join(self.static, "images", "a.png")
+        output = os.path.join(self.dest, "images", "a.png")
+        self.assertTrue(os.path.samefile(source, output))
+
+        synced = sync_dir(self.static, self.dest, synced, link=True, image_cache_dir=cache_dir)
+        self.assertFalse(os.path.samefile(source, output))
+        self.assertEqual(self.read(source), "png")
+        self.assertTrue(os.listdir(cache_dir))
+
+        inode = os.stat(output).st_ino
+        sync_dir(self.static, self.dest, synced, link=True, image_cache_dir=cache_dir)
+        self.assertEqual(os.stat(output).st_ino, inode)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
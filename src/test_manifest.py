@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from manifest import Manifest, MANIFEST_VERSION, hash_bytes, hash_file
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hash_file_matches_hash_bytes(self):
+        file_path = os.path.join(self.tmp.name, "page.md")
+        with open(file_path, "wb") as f:
+            f.write(b"# Title")
+        self.assertEqual(hash_file(file_path), hash_bytes(b"# Title"))
+
+    def test_load_missing_is_empty(self):
+        manifest = Manifest.load(self.path)
+        self.assertEqual(manifest.pages, {})
+        self.assertEqual(manifest.changed_inputs({"template.html": "t"}), {"template.html"})
+
+    def test_save_and_load_round_trip(self):
+        manifest = Manifest(self.path)
+        manifest.record_page("index.md", "index.html")
+        manifest.graph.set_inputs("docs/index.html", ["content/index.md", "template.html"])
+        manifest.record_inputs({"content/index.md": "abc", "template.html": "t", "content/gone.md": "x"})
+        manifest.save()
+
+        loaded = Manifest.load(self.path)
+        self.assertEqual(loaded.pages["index.md"], {"output": "index.html", "links": [], "meta": {}})
+        self.assertEqual(loaded.graph.inputs_of("docs/index.html"), ["content/index.md", "template.html"])
+        self.assertEqual(loaded.inputs, {"content/index.md": "abc", "template.html": "t"})
+        self.assertEqual(loaded.changed_inputs({"content/index.md": "abc", "template.html": "t2"}), {"template.html"})
+
+    def test_load_other_version_is_empty(self):
+        manifest = Manifest(self.path)
+        manifest.record_page("index.md", "index.html")
+        manifest.data["version"] = MANIFEST_VERSION + 1
+        manifest.save()
+        self.assertEqual(Manifest.load(self.path).pages, {})
+
+    def test_load_corrupt_is_empty(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(Manifest.load(self.path).pages, {})
+
+if __name__ == "__main__":
+    unittest.main()
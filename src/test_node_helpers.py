@@ -1,3 +1,4 @@
+import time
 import unittest
 import textwrap
 from node_helpers import text_node_to_html_node
@@ -9,7 +10,12 @@ from node_helpers import split_nodes_link
 from node_helpers import text_to_textnodes
 from node_helpers import markdown_to_blocks
 from node_helpers import block_to_block_type
+from node_helpers import classify_block
 from node_helpers import markdown_to_html_node
+from node_helpers import iter_blocks
+from node_helpers import iter_numbered_blocks
+from node_helpers import iter_markdown_html
+from node_helpers import MarkdownSyntaxError
 from textnode import TextNode, TextType
 from leafnode import LeafNode
 from blocktype import BlockType
@@ -312,6 +318,51 @@ class TestTextToTextNodes(unittest.TestCase):
             self.assertEqual(r_node.text, e_node.text)
             self.assertEqual(r_node.url, getattr(e_node, "url", None))
 
+    def test_matches_split_pipeline(self):
+        samples = [
+            "",
+            "plain text only",
+            "**bold** at start and _italic_ at end",
+            "![a](1.png)![b](2.png) then [x](1.com)[y](2.com)",
+            "`code` **b** _i_ [l](u) ![i](s)",
+            "brackets [not a link] and (parens) and ! alone",
+            "****",
+        ]
+        for text in samples:
+            nodes = [TextNode(text, TextType.TEXT)]
+            nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+            nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+            nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+            nodes = split_nodes_link(split_nodes_image(nodes))
+            self.assertEqual(text_to_textnodes(text), nodes, text)
+
+    def test_unmatched_delimiter_raises(self):
+        with self.assertRaisesRegex(ValueError, "invalid markdown syntax"):
+            text_to_textnodes("an **unclosed bold")
+
+    def test_code_span_is_not_scanned_for_other_markers(self):
+        self.assertEqual(
+            text_to_textnodes("call `snake_case**name` now"),
+            [
+                TextNode("call ", TextType.TEXT),
+                TextNode("snake_case**name", TextType.CODE),
+                TextNode(" now", TextType.TEXT),
+            ],
+        )
+
+    def test_link_url_with_underscores(self):
+        self.assertEqual(
+            text_to_textnodes("see [docs](https://example.com/a_b_c)"),
+            [
+                TextNode("see ", TextType.TEXT),
+                TextNode("docs", TextType.LINK, "https://example.com/a_b_c"),
+            ],
+        )
+
+    def test_incomplete_image_and_link_stay_text(self):
+        text = "![alt] and [text] (url) and [open"
+        self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_single_block(self):
         text = "This is a single paragraph."
@@ -343,6 +394,37 @@ class TestMarkdownToBlocks(unittest.TestCase):
         expected = ["Block one.", "Block two."]
         self.assertEqual(markdown_to_blocks(text), expected)
 
+    def test_matches_double_newline_split(self):
+        samples = [
+            "a\n\n\nb",
+            "a\n \n\nb\n",
+            "  x\n  y  \n\n\n\n   \n\nz",
+            "\n\n\n",
+            "# H\n\n- a\n- b\n\n```\ncode\n```",
+        ]
+        for text in samples:
+            expected = [p.strip() for p in text.split("\n\n") if p.strip() != ""]
+            self.assertEqual(markdown_to_blocks(text), expected, repr(text))
+
+    def test_iter_blocks_from_file_lines(self):
+        lines = iter(["# Title\n", "\n", "para one\n", "continued\n", "\n", "\n", "- item\n"])
+        self.assertEqual(list(iter_blocks(lines)), ["# Title", "para one\ncontinued", "- item"])
+
+    def test_iter_blocks_is_lazy(self):
+        def lines():
+            yield "first"
+            yield ""
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(iter_blocks(lines())), "first")
+
+    def test_numbered_blocks(self):
+        text = "# Title\n\n\npara one\ncontinued\n\n   \n- item\n\n"
+        self.assertEqual(list(iter_numbered_blocks(text.split("\n"))), [
+            (1, "# Title"),
+            (4, "para one\ncontinued"),
+            (8, "- item"),
+        ])
+
 class TestBlockToBlockType(unittest.TestCase):
 
     def test_heading_block(self):
@@ -392,6 +474,26 @@ class TestBlockToBlockType(unittest.TestCase):
         text = ""
         self.assertEqual(block_to_block_type(text), BlockType.PARAGRAPH)
 
+class TestClassifyBlock(unittest.TestCase):
+    def test_heading_payload(self):
+        self.assertEqual(classify_block("### Third level"), (BlockType.HEADING, (3, "Third level")))
+
+    def test_code_payload(self):
+        self.assertEqual(classify_block("```\nx = 1\n```"), (BlockType.CODE, (None, "x = 1\n")))
+
+    def test_quote_payload(self):
+        self.assertEqual(classify_block("> one\n> two"), (BlockType.QUOTE, "one two"))
+
+    def test_list_payloads(self):
+        self.assertEqual(classify_block("- a\n- b"), (BlockType.UL, ["a", "b"]))
+        self.assertEqual(classify_block("1. a\n2. b"), (BlockType.OL, ["a", "b"]))
+
+    def test_out_of_order_list_is_paragraph(self):
+        self.assertEqual(classify_block("1. a\n3. b"), (BlockType.PARAGRAPH, "1. a 3. b"))
+
+    def test_paragraph_payload(self):
+        self.assertEqual(classify_block("  one\ntwo  "), (BlockType.PARAGRAPH, "one two"))
+
 class TestMarkdownToHTML(unittest.TestCase):
     def test_paragraphs(self):
         md = textwrap.dedent("""
@@ -480,6 +582,110 @@ class TestMarkdownToHTML_Extra(unittest.TestCase):
         expected = "<div><h2>Subheading Level 2</h2></div>"
         self.assertEqual(html, expected)
 
+    def test_streaming_matches_tree(self):
+        md = "# Title\n\nSome **bold** text\n\n- a\n- b\n\n1. x\n2. y\n\n> quote\n\n```\ncode\n```"
+        streamed = "".join(iter_markdown_html(md.split("\n")))
+        self.assertEqual(streamed, markdown_to_html_node(md).to_html())
+
+    def test_streaming_empty_input_raises(self):
+        with self.assertRaises(ValueError):
+            "".join(iter_markdown_html([]))
+
+    def test_basepath_leaves_code_blocks_alone(self):
+        md = "[home](/index.html)\n\n```\n<a href=\"/x\">x</a>\n```"
+        html = markdown_to_html_node(md).to_html("/site/")
+        self.assertEqual(
+            html,
+            '<div><p><a href="/site/index.html">home</a></p><pre><code><a href="/x">x</a>\n</code></pre></div>',
+        )
+        self.assertEqual("".join(iter_markdown_html(md.split("\n"), "/site/")), html)
+
+    def test_basepath_leaves_protocol_relative_images_alone(self):
+        md = "![x](//cdn.example.com/a.png)"
+        html = markdown_to_html_node(md).to_html("/site/")
+        self.assertEqual(html, '<div><p><img src="//cdn.example.com/a.png" alt="x"></p></div>')
+        self.assertEqual("".join(iter_markdown_html(md.split("\n"), "/site/")), html)
+
+    def test_links_are_collected_with_lines(self):
+        md = "# Title\n\nSee [a](/a) and\n[b](/b) twice [b](/b)\n\n```\n[not](/code)\n```\n\n- ![img](/i.png)"
+        links = []
+        markdown_to_html_node(md, links=links)
+        self.assertEqual(links, [(3, "/a"), (4, "/b"), (4, "/b"), (10, "/i.png")])
+
+        streamed = []
+        "".join(iter_markdown_html(md.split("\n"), links=streamed))
+        self.assertEqual(streamed, links)
+
+    def test_urls_split_over_lines_keep_later_lines_right(self):
+        md = "[a](/x\n  y) then [b](/b)\nand [c](/c)"
+        links = []
+        markdown_to_html_node(md, links=links)
+        self.assertEqual(links, [(1, "/x y"), (2, "/b"), (3, "/c")])
+
+    def test_link_lines_ignore_earlier_copies_of_the_url(self):
+        cases = [
+            ("- item /blog\n- [x](/blog)", [(2, "/blog")]),
+            ("see /a here\n[x](/a)", [(2, "/a")]),
+            ("> quoting /a\n>   **b** [x](/a)", [(2, "/a")]),
+            ("## Heading /z\nmore [z](/z)", [(2, "/z")]),
+            ("- a\n   \n- `[n](/n)` ![i](/i)", [(3, "/i")]),
+        ]
+        for md, expected in cases:
+            links = []
+            markdown_to_html_node(md, links=links)
+            self.assertEqual(links, expected, md)
+            streamed = []
+            "".join(iter_markdown_html(md.split("\n"), links=streamed))
+            self.assertEqual(streamed, expected, md)
+
+    def test_syntax_errors_report_the_source_line(self):
+        cases = [
+            ("# Title\n\nfine _x_\nstill _open\nmore", 4),
+            ("- one\n- two `x` `y\n- three", 2),
+            ("intro\n\n> quote\n> **bold", 4),
+            ("a\n\n## Heading _x", 3),
+        ]
+        for md, line in cases:
+            with self.assertRaises(MarkdownSyntaxError, msg=md) as ctx:
+                markdown_to_html_node(md)
+            self.assertEqual(ctx.exception.line, line, md)
+            self.assertTrue(str(ctx.exception).startswith(f"line {line}: invalid markdown syntax"))
+            with self.assertRaises(MarkdownSyntaxError) as ctx:
+                "".join(iter_markdown_html(md.split("\n")))
+            self.assertEqual(ctx.exception.line, line, md)
+
+    def test_adversarial_input_parses_in_one_pass(self):
+        # Timings of the sizes are compared in bench/stress.py; here a large
+        # document only has to finish far inside what rescanning would take
+        # (a 1 MB block of links took about a minute when link lines were
+        # recounted from the start of the block)
+        blocks = [
+            "[a](/x) ![i](/y.png)\n" * 50000,
+            "[a](/x\ny) z\n" * 10000,
+            "[![" * 30000,
+            "_a_ **b** `c` " * 10000,
+            "# h\n" + "[a](/x)\n" * 20000,
+        ]
+        links = []
+        start = time.perf_counter()
+        markdown_to_html_node("\n\n".join(blocks), links=links, plain_text=[]).to_html()
+        self.assertLess(time.perf_counter() - start, 30)
+        self.assertEqual(len(links), 130000)
+        self.assertEqual(links[109999], (70001, "/x y"))
+        self.assertEqual(links[-1], (90009, "/x"))
+
+    def test_code_block_language(self):
+        md = "```python\nprint(\"<b>\")\n```\n\n```rust\nlet x = <b>;\n```\n\n```\n<b>\n```"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            '<div><pre><code class="language-python"><span class="hl-builtin">print</span>'
+            '(<span class="hl-string">"&lt;b&gt;"</span>)\n</code></pre>'
+            '<pre><code class="language-rust">let x = <b>;\n</code></pre>'
+            "<pre><code><b>\n</code></pre></div>",
+        )
+        self.assertEqual("".join(iter_markdown_html(md.split("\n"))), markdown_to_html_node(md).to_html())
+        self.assertEqual(classify_block("```a b\nx\n```"), (BlockType.CODE, (None, "a b\nx\n")))
+
     def test_empty_input_raises_for_parentnode(self):
         md = ""
         with self.assertRaises(ValueError):
@@ -1,3 +1,4 @@
+import io
 import unittest
 from leafnode import LeafNode
 from parentnode import ParentNode
@@ -89,6 +90,27 @@ class TestParentNode(unittest.TestCase):
         expected = "<div><p><span>A</span><span>B</span></p></div>"
         self.assertEqual(root.to_html(), expected)
 
+    def test_write_html_to_stream(self):
+        """Test that write_html streams the same markup to a writer."""
+        root = ParentNode("div", [ParentNode("p", [LeafNode("b", "A"), LeafNode(None, "B")])], {"id": "x"})
+        out = io.StringIO()
+        root.write_html(out.write)
+        self.assertEqual(out.getvalue(), root.to_html())
+        self.assertEqual(out.getvalue(), '<div id="x"><p><b>A</b>B</p></div>')
+
+    def test_write_html_raises_before_writing_invalid_child(self):
+        """Test that validation errors still surface when streaming."""
+        root = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            root.write_html(io.StringIO().write)
+
+    def test_to_html_wide_tree(self):
+        """Test a very wide list serializes completely."""
+        items = [ParentNode("li", [LeafNode(None, str(i))]) for i in range(20000)]
+        html = ParentNode("ul", items).to_html()
+        self.assertTrue(html.startswith("<ul><li>0</li><li>1</li>"))
+        self.assertTrue(html.endswith("<li>19999</li></ul>"))
+
 
 if __name__ == "__main__":
     unittest.main()
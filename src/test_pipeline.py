@@ -0,0 +1,63 @@
+import threading
+import time
+import unittest
+from pipeline import run_pipeline
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_results_in_input_order(self):
+        def read(item):
+            # Later items finish reading first
+            time.sleep((10 - item) / 1000)
+            return item * 2
+
+        written = []
+        results = list(run_pipeline(range(10), read, lambda item, data: data + 1, lambda item, out: written.append(out) or out))
+        self.assertEqual([item for item, result, error in results], list(range(10)))
+        self.assertEqual([result for item, result, error in results], [i * 2 + 1 for i in range(10)])
+        self.assertEqual(sorted(written), [i * 2 + 1 for i in range(10)])
+
+    def test_errors_reported_per_item(self):
+        def read(item):
+            if item == 1:
+                raise OSError("cannot read")
+            return item
+
+        def process(item, data):
+            if item == 2:
+                raise ValueError("bad markdown")
+            return data
+
+        def write(item, out):
+            if item == 3:
+                raise OSError("disk full")
+            return out
+
+        results = list(run_pipeline(range(5), read, process, write, io_threads=2, queue_depth=2))
+        errors = [(item, type(error).__name__) for item, result, error in results if error]
+        self.assertEqual(errors, [(1, "OSError"), (2, "ValueError"), (3, "OSError")])
+        self.assertEqual([result for item, result, error in results if not error], [0, 4])
+
+    def test_in_flight_items_are_bounded(self):
+        lock = threading.Lock()
+        live = {"now": 0, "max": 0}
+
+        def read(item):
+            with lock:
+                live["now"] += 1
+                live["max"] = max(live["max"], live["now"])
+            return item
+
+        def write(item, out):
+            time.sleep(0.001)
+            with lock:
+                live["now"] -= 1
+            return out
+
+        list(run_pipeline(range(200), read, lambda item, data: data, write, io_threads=2, queue_depth=4))
+        # queue_depth read ahead, the one being processed, and queue_depth awaiting write
+        self.assertLessEqual(live["max"], 4 * 2 + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
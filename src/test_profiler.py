@@ -0,0 +1,56 @@
+import unittest
+from profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_phase_records_time_calls_and_bytes(self):
+        profiler = Profiler()
+        with profiler.phase("read", 10):
+            pass
+        with profiler.phase("read", 5):
+            pass
+        seconds, calls, nbytes = profiler.phases["read"]
+        self.assertGreaterEqual(seconds, 0)
+        self.assertEqual((calls, nbytes), (2, 15))
+
+    def test_phase_records_on_error(self):
+        profiler = Profiler()
+        with self.assertRaises(ValueError):
+            with profiler.phase("parse"):
+                raise ValueError("bad")
+        self.assertEqual(profiler.phases["parse"][1], 1)
+
+    def test_timed_wraps_function(self):
+        profiler = Profiler()
+        upper = profiler.timed(str.upper, "inline tokenize")
+        self.assertEqual(upper("abc"), "ABC")
+        self.assertEqual(profiler.phases["inline tokenize"][1:], [1, 3])
+
+    def test_merge_snapshot(self):
+        worker = Profiler()
+        worker.add("render", 0.5, 100)
+        worker.count("cache.hit")
+        worker.record_page("a.md", 0.5)
+
+        parent = Profiler()
+        parent.add("render", 0.25, 50)
+        parent.merge(worker.snapshot())
+        self.assertEqual(parent.phases["render"], [0.75, 2, 150])
+        self.assertEqual(parent.counters, {"cache.hit": 1})
+        self.assertEqual(parent.pages, [(0.5, "a.md")])
+
+    def test_report_orders_phases_and_lists_slowest_pages(self):
+        profiler = Profiler()
+        profiler.add("write", 0.1)
+        profiler.add("read", 0.2)
+        for i in range(5):
+            profiler.record_page(f"page{i}.md", i / 10)
+        report = profiler.report(top=2)
+        self.assertLess(report.index("read"), report.index("write"))
+        self.assertIn("page4.md", report)
+        self.assertIn("page3.md", report)
+        self.assertNotIn("page2.md", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from publish import publish_stream, publish_text
+
+
+class TestPublish(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_identical_contents_are_not_rewritten(self):
+        self.assertTrue(publish_text(self.path, "<p>é</p>"))
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(publish_text(self.path, "<p>é</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertTrue(publish_text(self.path, "<p>e</p>"))
+        self.assertEqual(self.read(), "<p>e</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_replacing_a_hardlink_leaves_its_source_alone(self):
+        source = os.path.join(self.tmp.name, "source.html")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("source")
+        os.link(source, self.path)
+        publish_text(self.path, "output")
+        with open(source, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "source")
+
+    def test_identical_hardlinks_are_still_replaced(self):
+        source = os.path.join(self.tmp.name, "source.html")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("same")
+        os.link(source, self.path)
+        self.assertTrue(publish_text(self.path, "same"))
+        self.assertFalse(os.path.samefile(source, self.path))
+
+    def test_stream(self):
+        self.assertTrue(publish_stream(self.path, lambda f: f.write("a" * 10)))
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(publish_stream(self.path, lambda f: f.write("a" * 10)))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertTrue(publish_stream(self.path, lambda f: f.write("a" * 11)))
+        self.assertEqual(self.read(), "a" * 11)
+
+    def test_failed_stream_keeps_the_old_output(self):
+        publish_text(self.path, "old")
+
+        def fail(f):
+            f.write("half")
+            raise ValueError("render failed")
+
+        with self.assertRaises(ValueError):
+            publish_stream(self.path, fail)
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
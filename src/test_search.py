@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import unittest
+from search import SearchIndex, page_url, shard_name, tokenize
+
+
+class TestSearchHelpers(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize("The Hobbit, or There and Back Again (1937) a"), [
+            "the", "hobbit", "or", "there", "and", "back", "again", "1937",
+        ])
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("hobbit"), "ho")
+        self.assertEqual(shard_name("éowyn"), "_e9o")
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url(os.path.join("blog", "tom", "index.html"), "/site/"), "/site/blog/tom/")
+        self.assertEqual(page_url("about.html", "/site"), "/site/about.html")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "search")
+        self.state = {}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def shard(self, name):
+        with open(os.path.join(self.directory, name + ".json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def build(self, pages, removed=()):
+        index = SearchIndex(self.directory, self.state)
+        for source_rel, text in pages.items():
+            index.update_page(source_rel, "/" + source_rel, source_rel.title(), text)
+        for source_rel in removed:
+            index.remove_page(source_rel)
+        return index.write()
+
+    def test_postings_with_positions(self):
+        self.build({"a": "hobbit holes and hobbit feet", "b": "elves"})
+        self.assertEqual(self.shard("ho"), {"hobbit": {"0": [0, 3]}, "holes": {"0": [1]}})
+        self.assertEqual(self.shard("el"), {"elves": {"1": [0]}})
+
+    def test_only_shards_of_changed_pages_are_rewritten(self):
+        self.build({"a": "hobbit", "b": "elves"})
+        untouched = os.stat(os.path.join(self.directory, "el.json")).st_ino
+        self.assertEqual(self.build({"a": "dwarves"}), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "ho.json")))
+        self.assertEqual(self.shard("dw"), {"dwarves": {"0": [0]}})
+        self.assertEqual(os.stat(os.path.join(self.directory, "el.json")).st_ino, untouched)
+
+    def test_removed_page(self):
+        self.build({"a": "hobbit elves", "b": "elves"})
+        self.build({}, removed=["a"])
+        self.assertEqual(self.shard("el"), {"elves": {"1": [0]}})
+        with open(os.path.join(self.directory, "pages.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"1": {"url": "/b", "title": "B"}})
+        self.assertFalse(SearchIndex(self.directory, self.state).has_page("a"))
+
+    def test_lost_output_resets_state(self):
+        self.build({"a": "hobbit"})
+        os.remove(os.path.join(self.directory, "pages.json"))
+        self.assertFalse(SearchIndex(self.directory, self.state).has_page("a"))
+
+        # Ids restart at 0, so the old postings must not survive under the new page
+        self.build({"aardvark": "aardvark"})
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "ho.json")))
+        self.assertEqual(self.shard("aa"), {"aardvark": {"0": [0]}})
+
+    def test_lost_state_resets_output(self):
+        self.build({"a": "hobbit"})
+        self.state.clear()
+        self.build({"b": "elves"})
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "ho.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
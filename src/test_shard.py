@@ -0,0 +1,136 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from main_helpers import build_site, shard_of
+from manifest import Manifest
+from shard import ShardMergeError, merge_shards, parse_shard, shard_manifest_path
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = self.path("content")
+        self.static = self.path("static")
+        self.template = self.path("template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        for i in range(12):
+            self.write(os.path.join(self.content, "blog", f"p{i}.md"), f"# Post {i}\n\n[home](/index.html)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def tree(self, directory):
+        files = {}
+        for root, dirs, filenames in os.walk(directory):
+            for filename in filenames:
+                with open(os.path.join(root, filename), "rb") as f:
+                    files[os.path.relpath(os.path.join(root, filename), directory)] = f.read()
+        return files
+
+    def build(self, output, shard=None, manifest_path=None):
+        manifest = Manifest.load(manifest_path or shard_manifest_path(output))
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_site(self.content, self.static, output, self.template, basepath="/site/", manifest=manifest, shard=shard)
+        return manifest
+
+    def build_shards(self, count):
+        dirs = [self.path("shards", f"{i}-of-{count}") for i in range(1, count + 1)]
+        for i, output in enumerate(dirs, 1):
+            self.build(output, (i, count))
+        return dirs
+
+    def merge(self, dirs, manifest_path=None, basepath="/site/"):
+        manifest = Manifest(manifest_path or self.path("merged.json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            merge_shards(dirs, self.path("docs"), manifest, self.content, basepath)
+        return manifest
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for text in ("0/3", "4/3", "1", "a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_partition_is_complete(self):
+        paths = [f"blog/p{i}.md" for i in range(100)]
+        slices = [[path for path in paths if shard_of(path, 3) == i] for i in (1, 2, 3)]
+        self.assertEqual(sorted(sum(slices, [])), sorted(paths))
+        self.assertTrue(all(slices))
+
+    def test_merged_shards_match_a_full_build(self):
+        full = self.path("full")
+        self.build(full, manifest_path=self.path("full.json"))
+        merged_manifest = self.merge(self.build_shards(3))
+        self.assertEqual(self.tree(self.path("docs")), self.tree(full))
+
+        # The merged manifest lets an unsharded build continue incrementally
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            build_site(self.content, self.static, self.path("docs"), self.template, basepath="/site/", manifest=merged_manifest)
+        self.assertIn("Pages: 0 generated, 13 unchanged", out.getvalue())
+
+    def test_missing_shard(self):
+        dirs = self.build_shards(3)
+        with self.assertRaises(ShardMergeError) as ctx:
+            self.merge(dirs[:2])
+        self.assertIn("missing shard 3/3", str(ctx.exception))
+        self.assertIn("not built by any shard", str(ctx.exception))
+
+    def test_drafts_are_not_missing_pages(self):
+        self.write(os.path.join(self.content, "blog", "secret.md"), "---\ndraft: true\n---\n# Secret")
+        manifest = self.merge(self.build_shards(3))
+        self.assertNotIn(os.path.join("blog", "secret.md"), manifest.pages)
+        self.assertFalse(os.path.exists(self.path("docs", "blog", "secret.html")))
+
+    def test_conflicting_outputs(self):
+        dirs = self.build_shards(2)
+        self.write(os.path.join(dirs[1], "index.css"), "body { color: red; }")
+        with self.assertRaises(ShardMergeError) as ctx:
+            self.merge(dirs)
+        self.assertIn("index.css: differs between", str(ctx.exception))
+
+    def test_shards_built_from_different_templates(self):
+        first = self.path("shards", "1-of-2")
+        self.build(first, (1, 2))
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        second = self.path("shards", "2-of-2")
+        self.build(second, (2, 2))
+        with self.assertRaises(ShardMergeError) as ctx:
+            self.merge([first, second])
+        self.assertIn("built from a different", str(ctx.exception))
+
+    def test_shards_built_with_another_basepath(self):
+        dirs = self.build_shards(2)
+        with self.assertRaises(ShardMergeError) as ctx:
+            self.merge(dirs, basepath="/")
+        self.assertIn("built with a different basepath than this merge", str(ctx.exception))
+
+    def test_merge_only_touches_changed_files(self):
+        dirs = self.build_shards(2)
+        self.merge(dirs)
+        stray = self.path("docs", "old", "gone.html")
+        os.makedirs(os.path.dirname(stray))
+        self.write(stray, "stale")
+        css = self.path("docs", "index.css")
+        os.utime(css, ns=(1, 1))
+
+        self.merge(self.build_shards(2))
+        self.assertEqual(os.stat(css).st_mtime_ns, 1)
+        self.assertFalse(os.path.exists(self.path("docs", "old")))
+
+
+if __name__ == "__main__":
+    unittest.main()
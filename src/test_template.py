@@ -0,0 +1,73 @@
+import io
+import os
+import tempfile
+import unittest
+from template import Template
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_title_and_content(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>x</p>"),
+            "<title>Hi</title><article><p>x</p></article>",
+        )
+
+    def test_placeholders_in_order(self):
+        template = Template("{{ A }} and {{B}} then {{  A  }}")
+        self.assertEqual(template.placeholders, ["A", "B", "A"])
+        self.assertEqual(template.render(A="1", B="2"), "1 and 2 then 1")
+
+    def test_arbitrary_named_placeholders(self):
+        template = Template("<meta name=\"date\" content=\"{{ Date }}\">{{ Author }}")
+        self.assertEqual(template.render(Date="2024-01-01", Author="Tolkien"), "<meta name=\"date\" content=\"2024-01-01\">Tolkien")
+
+    def test_missing_values_left_untouched(self):
+        template = Template("<h1>{{ Title }}</h1>{{  Content }}")
+        self.assertEqual(template.render(Title="T"), "<h1>T</h1>{{  Content }}")
+
+    def test_values_are_not_reexpanded(self):
+        template = Template("{{ Content }}|{{ Title }}")
+        self.assertEqual(template.render(Content="{{ Title }}", Title="T"), "{{ Title }}|T")
+
+    def test_no_placeholders(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.placeholders, [])
+        self.assertEqual(template.render(Title="T"), "<p>static</p>")
+
+    def test_node_values_are_serialized(self):
+        template = Template("<article>{{ Content }}</article>")
+        node = ParentNode("div", [LeafNode("p", "x")])
+        self.assertEqual(template.render(Content=node), "<article><div><p>x</p></div></article>")
+
+    def test_write_streams_to_writer(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}{{ Footer }}")
+        out = io.StringIO()
+        template.write(out.write, Title="T", Content=ParentNode("div", [LeafNode(None, "body")]))
+        self.assertEqual(out.getvalue(), "<title>T</title><div>body</div>{{ Footer }}")
+
+    def test_basepath_rewrites_template_urls_once(self):
+        template = Template('<link href="/index.css"><img src="/a.png">{{ Content }}', "/site/")
+        self.assertEqual(template.segments[0], '<link href="/site/index.css"><img src="/site/a.png">')
+        node = ParentNode("p", [LeafNode("a", "x", {"href": "/blog"})])
+        self.assertEqual(
+            template.render(Content=node),
+            '<link href="/site/index.css"><img src="/site/a.png"><p><a href="/site/blog">x</a></p>',
+        )
+
+    def test_basepath_skips_protocol_relative_urls(self):
+        template = Template('<script src="//cdn.example.com/a.js"></script><a href="/">h</a>', "/site/")
+        self.assertEqual(template.segments[0], '<script src="//cdn.example.com/a.js"></script><a href="/site/">h</a>')
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("<title>{{ Title }}</title>")
+            self.assertEqual(Template.load(path).render(Title="X"), "<title>X</title>")
+
+
+if __name__ == "__main__":
+    unittest.main()
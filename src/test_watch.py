@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from watch import snapshot_paths, changed_paths, wait_for_changes, start_server
+
+
+class FakeWaiter():
+    def __init__(self, paths, edits):
+        self.paths = paths
+        self.interval = 0
+        self.edits = list(edits)
+
+    def wait(self, timeout):
+        if self.edits:
+            self.edits.pop(0)()
+
+
+class TestChangeDetection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        os.makedirs(self.content)
+        self.page = os.path.join(self.content, "index.md")
+        self.write(self.page, "# Home")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_changed_paths(self):
+        before = snapshot_paths([self.content])
+        new_page = os.path.join(self.content, "new.md")
+        self.write(new_page, "# New")
+        os.utime(self.page, ns=(1, 1))
+        self.assertEqual(changed_paths(before, snapshot_paths([self.content])), [self.page, new_page])
+
+        before = snapshot_paths([self.content])
+        os.remove(new_page)
+        self.assertEqual(changed_paths(before, snapshot_paths([self.content])), [new_page])
+
+    def test_burst_of_changes_is_coalesced(self):
+        snapshot = snapshot_paths([self.content])
+        pages = [os.path.join(self.content, f"p{i}.md") for i in range(3)]
+        edits = [lambda p=p: self.write(p, "# P") for p in pages]
+        changed, latest = wait_for_changes(FakeWaiter([self.content], edits), snapshot, debounce=0)
+        self.assertEqual(changed, sorted(pages))
+        self.assertEqual(latest, snapshot_paths([self.content]))
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "index.html"), "w", encoding="utf-8") as f:
+            f.write("<p>hi</p>")
+        self.server = start_server(self.tmp.name, 0)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_etag_and_not_modified(self):
+        with urllib.request.urlopen(self.base) as response:
+            etag = response.headers["ETag"]
+            self.assertEqual(response.read(), b"<p>hi</p>")
+        self.assertTrue(etag)
+
+        request = urllib.request.Request(self.base, headers={"If-None-Match": etag})
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(request)
+        self.assertEqual(ctx.exception.code, 304)
+
+    def test_etag_changes_with_content(self):
+        with urllib.request.urlopen(self.base + "index.html") as response:
+            etag = response.headers["ETag"]
+        with open(os.path.join(self.tmp.name, "index.html"), "w", encoding="utf-8") as f:
+            f.write("<p>changed content</p>")
+        request = urllib.request.Request(self.base + "index.html", headers={"If-None-Match": etag})
+        with urllib.request.urlopen(request) as response:
+            self.assertNotEqual(response.headers["ETag"], etag)
+            self.assertEqual(response.read(), b"<p>changed content</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+import time
+import logging
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.5
+DEBOUNCE_SECONDS = 0.3
+
+def snapshot_paths(paths):
+    snapshot = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for root, dirs, files in os.walk(path):
+            for filename in files:
+                file_path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue  # removed between listing and stat
+                snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+def changed_paths(before, after):
+    changed = {path for path in after if before.get(path) != after[path]}
+    changed.update(path for path in before if path not in after)
+    return sorted(changed)
+
+class ChangeWaiter():
+    # Sleeps between polls, or blocks on inotify events when inotify_simple is installed
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.paths = paths
+        self.interval = interval
+        self.inotify = inotify_simple.INotify() if inotify_simple else None
+
+    def watch_dirs(self):
+        if self.inotify is None:
+            return
+        flags = inotify_simple.flags
+        mask = flags.CREATE | flags.DELETE | flags.MODIFY | flags.MOVED_FROM | flags.MOVED_TO | flags.CLOSE_WRITE
+        for path in self.paths:
+            directories = [os.path.dirname(path) or "."] if os.path.isfile(path) else [
+                root for root, dirs, files in os.walk(path)
+            ]
+            for directory in directories:
+                try:
+                    self.inotify.add_watch(directory, mask)
+                except OSError:
+                    pass
+
+    def wait(self, timeout):
+        if self.inotify is None:
+            time.sleep(timeout)
+        else:
+            self.inotify.read(timeout=int(timeout * 1000))
+
+def wait_for_changes(waiter, snapshot, debounce=DEBOUNCE_SECONDS):
+    while True:
+        waiter.wait(waiter.interval)
+        current = snapshot_paths(waiter.paths)
+        changed = changed_paths(snapshot, current)
+        if changed:
+            break
+
+    # Coalesce a burst of saves (editors, git checkouts) into one rebuild
+    while True:
+        waiter.wait(debounce)
+        latest = snapshot_paths(waiter.paths)
+        more = changed_paths(current, latest)
+        if not more:
+            return changed_paths(snapshot, latest), latest
+        current = latest
+
+class DevServer(ThreadingHTTPServer):
+    def __init__(self, address, handler):
+        super().__init__(address, handler)
+        # path -> ((mtime_ns, size), etag), so files are only hashed again after they change
+        self.etags = {}
+        self.etags_lock = threading.Lock()
+
+class ETagRequestHandler(SimpleHTTPRequestHandler):
+    def file_etag(self, path):
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self.server.etags_lock:
+            cached = self.server.etags.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()[:32]}"'
+
+        with self.server.etags_lock:
+            self.server.etags[path] = (key, etag)
+        return etag
+
+    def send_head(self):
+        self._etag = None
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                return super().send_head()  # redirect to the slash-terminated URL
+            path = os.path.join(path, "index.html")
+
+        if os.path.isfile(path):
+            self._etag = self.file_etag(path)
+            if_none_match = [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]
+            if self._etag in if_none_match:
+                self.send_response(304)
+                self.end_headers()
+                return None
+        return super().send_head()
+
+    def end_headers(self):
+        if getattr(self, "_etag", None):
+            self.send_header("ETag", self._etag)
+            # Browsers revalidate every request, which is cheap with the ETag
+            self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+def start_server(directory, port, host="127.0.0.1"):
+    server = DevServer((host, port), partial(ETagRequestHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def run_build(build):
+    start = time.perf_counter()
+    try:
+        build()
+    except Exception as e:
+        # A broken page should not stop the dev server
+        print(f"Build failed: {e}")
+        return False
+    print(f"Built in {time.perf_counter() - start:.2f}s")
+    return True
+
+def serve_and_watch(build, public_dir, watch_paths, port=8888, host="127.0.0.1"):
+    os.makedirs(public_dir, exist_ok=True)
+    run_build(build)
+    server = start_server(public_dir, port, host)
+    print(f"Serving {public_dir} at http://{host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    mode = "inotify" if inotify_simple else "polling"
+    print(f"Watching {', '.join(watch_paths)} ({mode})")
+
+    waiter = ChangeWaiter(watch_paths)
+    waiter.watch_dirs()
+    snapshot = snapshot_paths(watch_paths)
+    try:
+        while True:
+            changed, snapshot = wait_for_changes(waiter, snapshot)
+            print(f"{len(changed)} change(s) detected, rebuilding: {', '.join(changed[:5])}{' ...' if len(changed) > 5 else ''}")
+            run_build(build)
+            waiter.watch_dirs()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()